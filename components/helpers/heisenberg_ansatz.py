@@ -4,7 +4,7 @@
 实现海森堡模型的哈密顿量激发ansatz。
 """
 
-import numpy as np
+import math
 from qiskit import QuantumCircuit
 from qiskit.circuit import ParameterVector
 
@@ -13,7 +13,9 @@ def heisenberg_ansatz(n: int, reps: int) -> QuantumCircuit:
     """
     构建海森堡模型的哈密顿量激发ansatz
     
-    使用RXX、RYY、RZZ门模拟各向同性海森堡相互作用
+    每对相邻比特作用 exp(-iθ/2 (XX+YY+ZZ)) 模拟各向同性海森堡相互作用
+    （XX、YY、ZZ两两对易，等价于依次作用相同角度的RXX、RYY、RZZ），
+    采用3个CNOT的显式分解（Vatan-Williams），而非三个旋转门各自分解所需的6个CNOT
     
     Args:
         n: 量子比特数
@@ -24,14 +26,10 @@ def heisenberg_ansatz(n: int, reps: int) -> QuantumCircuit:
     """
     qc = QuantumCircuit(n)
     
-    # 初始状态: Neel态加小扰动
+    # 初始状态: Neel态 |101010...⟩ 加小的横向场扰动打破对称性
+    # 作用在|0⟩上时 RY(π/8)·X 与 RY(π + π/8) 给出同一状态，偶数位合并为单个旋转门
     for i in range(n):
-        if i % 2 == 0:
-            qc.x(i)  # 创建 |101010...⟩
-    
-    # 添加小的横向场打破对称性
-    for i in range(n):
-        qc.ry(np.pi/8, i)
+        qc.ry(9 * math.pi / 8 if i % 2 == 0 else math.pi / 8, i)
     
     # 参数：每层2n个 (n个用于交换，n个用于场)
     num_params_per_layer = 2 * n
@@ -39,16 +37,23 @@ def heisenberg_ansatz(n: int, reps: int) -> QuantumCircuit:
     params = ParameterVector('θ', total_params)
     param_idx = 0
     
+    half_pi = math.pi / 2
+    
     for layer in range(reps):
         # 海森堡交换层 (XX + YY + ZZ用相同参数)
         for i in range(n):
             next_i = (i + 1) % n
             theta = params[param_idx]
             
-            # 各向同性：所有三个旋转用相同角度
-            qc.rxx(theta, i, next_i)
-            qc.ryy(theta, i, next_i)
-            qc.rzz(theta, i, next_i)
+            # 各向同性交换块：3个CNOT实现 exp(-iθ/2 (XX+YY+ZZ))（相差全局相位）
+            qc.rz(half_pi, next_i)
+            qc.cx(next_i, i)
+            qc.rz(theta + half_pi, i)
+            qc.ry(theta + half_pi, next_i)
+            qc.cx(i, next_i)
+            qc.ry(-theta - half_pi, next_i)
+            qc.cx(next_i, i)
+            qc.rz(-half_pi, i)
             param_idx += 1
         
         # 局域场层
@@ -4,9 +4,13 @@
 实现海森堡自旋链模型的哈密顿量构建功能。
 """
 
-from qiskit.quantum_info import SparsePauliOp
+from functools import lru_cache
 
+import numpy as np
+from qiskit.quantum_info import PauliList, SparsePauliOp
 
+
+@lru_cache(maxsize=32)
 def build_heisenberg_h(
     n: int,  # 适配框架参数名
     Jx: float = 1.0,
@@ -26,49 +30,43 @@ def build_heisenberg_h(
         boundary: 边界条件 ('periodic' 或 'open')
     
     Returns:
-        SparsePauliOp: Qiskit 稀疏泡利哈密顿量
+        SparsePauliOp: Qiskit 稀疏泡利哈密顿量（相同参数返回缓存的同一对象，请勿原地修改）
     """
-    H_list = []
     pbc = (boundary == 'periodic')
+    num_bonds = n if pbc else n - 1  # 开边界时跳过最后一个
+    # (x位, z位, 系数)：X=(1,0), Y=(1,1), Z=(0,1)
+    couplings = [(xb, zb, J) for xb, zb, J in ((True, False, Jx), (True, True, Jy), (False, True, Jz))
+                 if abs(J) > 1e-12]
+    has_field = abs(hz) > 1e-12
+    num_coupling_terms = num_bonds * len(couplings)
+    num_terms = num_coupling_terms + (n if has_field else 0)
 
-    # 相互作用项
-    for i in range(n):
-        if (not pbc) and (i == n - 1):  # 开边界时跳过最后一个
-            continue
-        j = (i + 1) % n
-
-        # X-X
-        if abs(Jx) > 1e-12:
-            pauli_str = ['I'] * n
-            pauli_str[i] = 'X'
-            pauli_str[j] = 'X'
-            H_list.append((''.join(pauli_str), Jx))
-
-        # Y-Y
-        if abs(Jy) > 1e-12:
-            pauli_str = ['I'] * n
-            pauli_str[i] = 'Y'
-            pauli_str[j] = 'Y'
-            H_list.append((''.join(pauli_str), Jy))
+    # 直接构造辛表示 (z, x)，跳过泡利字符串解析；标签第p位对应量子比特 n-1-p
+    z = np.zeros((num_terms, n), dtype=bool)
+    x = np.zeros((num_terms, n), dtype=bool)
+    coeffs = np.empty(num_terms, dtype=complex)
+    bonds = np.arange(num_bonds)
+    left = n - 1 - bonds
+    right = n - 1 - (bonds + 1) % n
 
-        # Z-Z
-        if abs(Jz) > 1e-12:
-            pauli_str = ['I'] * n
-            pauli_str[i] = 'Z'
-            pauli_str[j] = 'Z'
-            H_list.append((''.join(pauli_str), Jz))
+    # 相互作用项（按键排列，每个键依次为 X-X, Y-Y, Z-Z）
+    for c, (xb, zb, J) in enumerate(couplings):
+        rows = bonds * len(couplings) + c
+        x[rows, left] = x[rows, right] = xb
+        z[rows, left] = z[rows, right] = zb
+        coeffs[rows] = J
 
     # 磁场项
-    if abs(hz) > 1e-12:
-        for i in range(n):
-            pauli_str = ['I'] * n
-            pauli_str[i] = 'Z'
-            H_list.append((''.join(pauli_str), hz))
+    if has_field:
+        sites = np.arange(n)
+        rows = num_coupling_terms + sites
+        z[rows, n - 1 - sites] = True
+        coeffs[rows] = hz
 
-    return SparsePauliOp.from_list(H_list)
+    return SparsePauliOp(PauliList.from_symplectic(z, x), coeffs)
 
 
 if __name__ == "__main__":
     # 简单测试
-    H = create_spin_chain_hamiltonian(4, 1.0, 1.0, 1.0, 0.5)
+    H = build_heisenberg_h(4, 1.0, 1.0, 1.0, 0.5)
     print(f"Heisenberg(4): {len(H)} terms")
\ No newline at end of file
@@ -24,6 +24,8 @@ def run_molecular_vqe(qubit_hamiltonian, ansatz, maxiter=3000):
     # Setup estimator and optimizer
     estimator = Estimator()
     optimizer = L_BFGS_B(maxiter=maxiter)
+    # Evaluate all finite-difference gradient points in one batched Estimator call
+    optimizer.set_max_evals_grouped(max(1, ansatz.num_parameters))
     
     # Create and run VQE
     vqe = VQE(estimator, ansatz, optimizer)
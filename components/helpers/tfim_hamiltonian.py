@@ -4,34 +4,41 @@ TFIM哈密顿量构建器 - QuantumForge vNext
 实现横向场伊辛模型(TFIM)的哈密顿量构建功能。
 """
 
-from qiskit.quantum_info import SparsePauliOp
+from functools import lru_cache
 
+import numpy as np
+from qiskit.quantum_info import PauliList, SparsePauliOp
 
+
+@lru_cache(maxsize=32)
 def build_tfim_h(n, hx, j, boundary='periodic'):
     """
     构建TFIM哈密顿量
     
     H = -J * sum(Z_i * Z_{i+1}) - hx * sum(X_i)
-    """
-    pauli_list = []
     
+    相同参数的调用返回缓存的同一个算符对象，调用方不应原地修改。
+    """
+    num_bonds = n if boundary == 'periodic' else n - 1
+    # 零横向场时不生成X项（无耦合键时保留，保证算符非空）
+    num_field = n if (abs(hx) > 1e-12 or num_bonds == 0) else 0
+    sites = np.arange(num_field)
+    bonds = np.arange(num_bonds)
+
+    # 直接构造辛表示 (z, x)，跳过泡利字符串解析；标签第p位对应量子比特 n-1-p
+    z = np.zeros((num_field + num_bonds, n), dtype=bool)
+    x = np.zeros((num_field + num_bonds, n), dtype=bool)
+
     # 横向场项: -hx * sum(X_i)
-    for i in range(n):
-        pauli_str = ['I'] * n
-        pauli_str[i] = 'X'
-        pauli_list.append((''.join(pauli_str), -hx))
-    
+    x[sites, n - 1 - sites] = True
+
     # 耦合项: -J * sum(Z_i * Z_{i+1})
-    for i in range(n):
-        next_i = (i + 1) % n if boundary == 'periodic' else i + 1
-        if boundary == 'open' and next_i >= n:
-            continue
-        pauli_str = ['I'] * n
-        pauli_str[i] = 'Z'
-        pauli_str[next_i] = 'Z'
-        pauli_list.append((''.join(pauli_str), -j))
-    
-    return SparsePauliOp.from_list(pauli_list)
+    rows = num_field + bonds
+    z[rows, n - 1 - bonds] = True
+    z[rows, n - 1 - (bonds + 1) % n] = True
+
+    coeffs = np.concatenate([np.full(num_field, -hx, dtype=complex), np.full(num_bonds, -j, dtype=complex)])
+    return SparsePauliOp(PauliList.from_symplectic(z, x), coeffs)
 
 
 if __name__ == "__main__":
@@ -4,7 +4,6 @@ TFIM哈密顿量激发Ansatz构建器 - QuantumForge vNext
 实现TFIM的哈密顿量激发ansatz电路，直接对应TFIM物理结构。
 """
 
-import numpy as np
 from qiskit import QuantumCircuit
 from qiskit.circuit import ParameterVector
 
@@ -42,9 +41,8 @@ def tfim_hea(n, reps):
         # ZZ相互作用层（模拟 -J*ΣZᵢZᵢ₊₁）
         for i in range(n):
             next_i = (i + 1) % n
-            qc.cx(i, next_i)
-            qc.rz(params[param_idx], next_i)
-            qc.cx(i, next_i)
+            # CX·RZ(θ)·CX 即 RZZ(θ)，用单个门代替三门分解
+            qc.rzz(params[param_idx], i, next_i)
             param_idx += 1
         
         # X场层（模拟 -hx*ΣXᵢ）
@@ -5,7 +5,7 @@ VQE模板函数 - QuantumForge vNext
 """
 
 from qiskit_algorithms import VQE
-from qiskit_algorithms.optimizers import COBYLA, L_BFGS_B
+from qiskit_algorithms.optimizers import COBYLA, L_BFGS_B, SPSA
 from qiskit.primitives import Estimator
 
 
@@ -14,9 +14,19 @@ def create_cobyla_optimizer(maxiter=1000):
     return COBYLA(maxiter=maxiter)
 
 
-def create_l_bfgs_b_optimizer(maxiter=1000):
-    """创建L-BFGS-B优化器"""
-    return L_BFGS_B(maxiter=maxiter)
+def create_l_bfgs_b_optimizer(maxiter=1000, max_evals_grouped=64):
+    """
+    创建L-BFGS-B优化器
+    
+    有限差分梯度的各评估点按max_evals_grouped分组，每组作为一次Estimator批量调用；
+    取值不小于ansatz参数数时整个梯度只需一次调用
+    """
+    return L_BFGS_B(maxiter=maxiter, max_evals_grouped=max_evals_grouped)
+
+
+def create_spsa_optimizer(maxiter=1000):
+    """创建SPSA优化器（每步仅需两次能量评估，适合参数较多的ansatz）"""
+    return SPSA(maxiter=maxiter)
 
 
 def create_estimator():
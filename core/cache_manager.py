@@ -8,11 +8,23 @@
 import json
 import time
 import hashlib
+from collections import namedtuple
 from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
 
+# 查询结果缓存条目（不可变元组，比每条目一个dict更省内存）
+QueryCacheEntry = namedtuple("QueryCacheEntry", ["query", "task_card", "result_code", "generated_at"])
+
+# 缓存类型 -> CacheManager中对应的存储属性名
+_CACHE_STORES = {
+    "registry": "_registry_cache",
+    "agent": "_agent_cache",
+    "query": "_query_cache",
+}
+
+
 @dataclass
 class CacheConfig:
     """缓存配置"""
@@ -69,9 +81,25 @@ class CacheManager:
         
         return time.time() - self._cache_timestamps[key] > self.config.ttl
     
+    def _stamp(self, key: str, current_time: float) -> None:
+        """
+        记录条目写入时间
+        
+        先删除再插入，使_cache_timestamps保持按写入时间排序（首个条目即最旧条目）
+        """
+        self._cache_timestamps.pop(key, None)
+        self._cache_timestamps[key] = current_time
+        self._cache_access_times[key] = current_time
+    
     def _cleanup_expired(self, cache_dict: Dict[str, Any]) -> None:
         """清理过期缓存"""
         current_time = time.time()
+        
+        # 快速路径：最旧的条目都未过期时无需扫描
+        oldest_timestamp = next(iter(self._cache_timestamps.values()), None)
+        if oldest_timestamp is None or current_time - oldest_timestamp <= self.config.ttl:
+            return
+        
         expired_keys = [
             key for key, timestamp in self._cache_timestamps.items()
             if current_time - timestamp > self.config.ttl and key in cache_dict
@@ -109,8 +137,7 @@ class CacheManager:
         current_time = time.time()
         
         self._registry_cache[key] = registry_data
-        self._cache_timestamps[key] = current_time
-        self._cache_access_times[key] = current_time
+        self._stamp(key, current_time)
         
         self._cleanup_expired(self._registry_cache)
         self._enforce_max_entries(self._registry_cache)
@@ -139,8 +166,7 @@ class CacheManager:
         current_time = time.time()
         
         self._agent_cache[key] = response
-        self._cache_timestamps[key] = current_time
-        self._cache_access_times[key] = current_time
+        self._stamp(key, current_time)
         
         self._cleanup_expired(self._agent_cache)
         self._enforce_max_entries(self._agent_cache)
@@ -169,14 +195,8 @@ class CacheManager:
         key = f"query_{self._generate_key(query_data)}"
         current_time = time.time()
         
-        self._query_cache[key] = {
-            "query": query,
-            "task_card": task_card,
-            "result_code": result_code,
-            "generated_at": current_time
-        }
-        self._cache_timestamps[key] = current_time
-        self._cache_access_times[key] = current_time
+        self._query_cache[key] = QueryCacheEntry(query, task_card, result_code, current_time)
+        self._stamp(key, current_time)
         
         self._cleanup_expired(self._query_cache)
         self._enforce_max_entries(self._query_cache)
@@ -194,7 +214,7 @@ class CacheManager:
         
         # 更新访问时间
         self._cache_access_times[key] = time.time()
-        return self._query_cache[key]["result_code"]
+        return self._query_cache[key].result_code
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
@@ -224,18 +244,16 @@ class CacheManager:
     
     def clear_cache(self, cache_type: Optional[str] = None) -> None:
         """清理缓存"""
-        if cache_type == "registry" or cache_type is None:
-            self._registry_cache.clear()
-        
-        if cache_type == "agent" or cache_type is None:
-            self._agent_cache.clear()
-        
-        if cache_type == "query" or cache_type is None:
-            self._query_cache.clear()
-        
         if cache_type is None:
+            for store_name in _CACHE_STORES.values():
+                getattr(self, store_name).clear()
             self._cache_timestamps.clear()
             self._cache_access_times.clear()
+            return
+        
+        store_name = _CACHE_STORES.get(cache_type)
+        if store_name is not None:
+            getattr(self, store_name).clear()
     
     def find_similar_queries(self, query: str, similarity_threshold: float = 0.8) -> List[Dict[str, Any]]:
         """查找相似的查询（基于字符串相似度）"""
@@ -246,7 +264,7 @@ class CacheManager:
         query_lower = query.lower()
         
         for cached_data in self._query_cache.values():
-            cached_query = cached_data["query"].lower()
+            cached_query = cached_data.query.lower()
             
             # 简单的字符串相似度计算
             similarity = self._calculate_similarity(query_lower, cached_query)
@@ -254,9 +272,9 @@ class CacheManager:
             if similarity >= similarity_threshold:
                 similar_queries.append({
                     "similarity": similarity,
-                    "query": cached_data["query"],
-                    "task_card": cached_data["task_card"],
-                    "generated_at": cached_data["generated_at"]
+                    "query": cached_data.query,
+                    "task_card": cached_data.task_card,
+                    "generated_at": cached_data.generated_at
                 })
         
         # 按相似度降序排序
@@ -5,11 +5,14 @@
 基于new.md第7节的确定性合并规则实现。
 """
 
+import re
+import zlib
 from typing import Dict, List, Any, Set
 try:
     from .execution_memory import Memory
-    from .import_manager import normalize_imports
-    from .code_templates import generate_file_banner, main_wrapper, emit_entry, generate_param_aliases
+    from .import_manager import normalize_imports, PYTHON_TYPE_IMPORTS
+    from .code_templates import generate_file_banner, main_wrapper, emit_entry, generate_param_aliases, create_complete_program
+    from .helper_loader import load_helper_functions
     from .llm_engine import create_engine
 except ImportError:
     # 直接运行时的兼容处理
@@ -17,11 +20,46 @@ except ImportError:
     import os
     sys.path.append(os.path.dirname(__file__))
     from execution_memory import Memory
-    from import_manager import normalize_imports
-    from code_templates import generate_file_banner, main_wrapper, emit_entry, generate_param_aliases
+    from import_manager import normalize_imports, PYTHON_TYPE_IMPORTS
+    from code_templates import generate_file_banner, main_wrapper, emit_entry, generate_param_aliases, create_complete_program
+    from helper_loader import load_helper_functions
     from llm_engine import create_engine
 
 
+# 参数名中需要替换为下划线的字符
+_INVALID_IDENTIFIER_CHARS = re.compile(r'[^a-zA-Z0-9_]')
+
+# 不能直接用作参数名的保留字
+_RESERVED_PARAM_NAMES = frozenset({'def', 'class', 'import', 'from', 'if', 'else', 'return'})
+
+# Python类型 -> 参数规格中的类型名
+_PARAM_TYPE_NAMES = {
+    type(None): "Any",
+    bool: "bool",
+    int: "int",
+    float: "float",
+    str: "str",
+    list: "List",
+    dict: "Dict"
+}
+
+# 子类实例的回退判断顺序（bool不可被继承，已由精确查表覆盖）
+_PARAM_TYPE_FALLBACKS = (
+    (int, "int"),
+    (float, "float"),
+    (str, "str"),
+    (list, "List"),
+    (dict, "Dict")
+)
+
+# main函数体末尾的固定输出语句（与输入无关，模块加载时构造一次）
+_MAIN_BODY_FOOTER = (
+    "    # Output results",
+    "    print(f'Ground state energy: {energy:.6f}')",
+    "    return energy",
+)
+
+
 def assemble(memory: Memory, pipeline_plan: Dict[str, Any], task_card: Dict[str, Any], param_map: Dict[str, Any]) -> str:
     """
     装配完整的Python源码
@@ -46,17 +84,13 @@ def assemble(memory: Memory, pipeline_plan: Dict[str, Any], task_card: Dict[str,
     for cell in code_cells:
         all_imports.extend(cell.imports)
     
-    # 去重和分组排序
-    normalized_imports = normalize_imports(all_imports)
-    
     # 3. 收集helpers（处理命名冲突），过滤出真正的definitions
     all_helpers, filtered_definitions = _merge_code_sections_fixed(code_cells)
     
     # 3.5 加载真实的helper函数实现 (不使用helper导入，避免污染)
-    from .helper_loader import load_helper_functions
     all_helpers, _ = load_helper_functions(all_helpers)  # 忽略helper_imports
     
-    # 不合并helper导入，保持ComponentImports的纯净性
+    # 去重和分组排序（不合并helper导入，保持ComponentImports的纯净性）
     normalized_imports = normalize_imports(all_imports)
     
     # 3.6 清理definitions中的无效变量名（排除invoke代码）
@@ -70,11 +104,6 @@ def assemble(memory: Memory, pipeline_plan: Dict[str, Any], task_card: Dict[str,
     args_spec = _build_args_spec(task_card, param_map)
     
     # 6. 使用代码模板装配
-    try:
-        from .code_templates import create_complete_program
-    except ImportError:
-        from code_templates import create_complete_program
-    
     complete_code = create_complete_program(
         query=task_card.get("problem", "Unknown query"),
         algorithm=task_card.get("algorithm", "VQE").upper(),
@@ -102,16 +131,6 @@ def _add_typing_imports(code_content: str) -> str:
     Returns:
         添加typing imports后的代码
     """
-    PYTHON_TYPE_IMPORTS = {
-        "Dict": "from typing import Dict",
-        "List": "from typing import List", 
-        "Optional": "from typing import Optional",
-        "Union": "from typing import Union",
-        "Tuple": "from typing import Tuple",
-        "Any": "from typing import Any",
-        "Callable": "from typing import Callable"
-    }
-    
     needed_imports = set()
     
     # 检测类型注解中的typing类型
@@ -129,10 +148,8 @@ def _add_typing_imports(code_content: str) -> str:
             if line.startswith('from ') or line.startswith('import '):
                 import_end_idx = i
         
-        # 在imports区域插入typing imports
-        for typing_import in sorted(needed_imports):
-            lines.insert(import_end_idx + 1, typing_import)
-            import_end_idx += 1
+        # 在imports区域一次性插入typing imports（单次切片赋值，避免逐条insert反复移动后续行）
+        lines[import_end_idx + 1:import_end_idx + 1] = sorted(needed_imports)
             
         print(f"📝 Auto-added typing imports: {', '.join(needed_imports)}")
         return '\n'.join(lines)
@@ -215,46 +232,6 @@ def _is_definition_not_invoke(definition: str) -> bool:
     return False
 
 
-def _merge_code_sections(code_cells: List[Any]) -> tuple[List[str], List[str]]:
-    """
-    合并代码段落，处理命名冲突
-    
-    Args:
-        code_cells: CodeCell列表
-        
-    Returns:
-        (合并后的helpers, 合并后的definitions)
-    """
-    all_helpers = []
-    all_definitions = []
-    used_names = set()
-    
-    for cell in code_cells:
-        cell_id = cell.id
-        
-        # 处理helpers
-        for helper in cell.helpers:
-            processed_helper = _resolve_naming_conflict(helper, used_names, cell_id)
-            all_helpers.append(processed_helper)
-            
-            # 提取函数名并记录
-            func_name = _extract_function_name(processed_helper)
-            if func_name:
-                used_names.add(func_name)
-        
-        # 处理definitions
-        for definition in cell.definitions:
-            processed_def = _resolve_naming_conflict(definition, used_names, cell_id)
-            all_definitions.append(processed_def)
-            
-            # 提取定义名并记录
-            def_name = _extract_definition_name(processed_def)
-            if def_name:
-                used_names.add(def_name)
-    
-    return all_helpers, all_definitions
-
-
 def _resolve_naming_conflict(code_line: str, used_names: Set[str], cell_id: str) -> str:
     """
     解决命名冲突
@@ -285,10 +262,8 @@ def _extract_function_name(code_line: str) -> str:
     """提取函数名"""
     code_line = code_line.strip()
     if code_line.startswith("def "):
-        # 提取 "def function_name(" 中的函数名
-        parts = code_line[4:].split("(")
-        if parts:
-            return parts[0].strip()
+        # 提取 "def function_name(" 中的函数名（partition只切第一处，不拆分整个函数体）
+        return code_line[4:].partition("(")[0].strip()
     return ""
 
 
@@ -297,9 +272,7 @@ def _extract_definition_name(code_line: str) -> str:
     code_line = code_line.strip()
     if " = " in code_line and not code_line.startswith("def "):
         # 提取 "VARIABLE = value" 中的变量名
-        parts = code_line.split(" = ")
-        if parts:
-            return parts[0].strip()
+        return code_line.partition(" = ")[0].strip()
     return ""
 
 
@@ -343,9 +316,7 @@ def _generate_main_body(code_cells: List[Any], pipeline_plan: Dict[str, Any], pa
     
     # 添加输出语句
     if body_lines:  # 只有在有invoke代码时才添加输出
-        body_lines.append("    # Output results")
-        body_lines.append("    print(f'Ground state energy: {energy:.6f}')")
-        body_lines.append("    return energy")
+        body_lines.extend(_MAIN_BODY_FOOTER)
     
     return '\n'.join(body_lines)
 
@@ -367,9 +338,8 @@ def _build_args_spec(task_card: Dict[str, Any], param_map: Dict[str, Any]) -> Di
     normalized_params = param_map.get("validated", param_map.get("normalized_params", {}))
     defaults = param_map.get("defaults", {})
     
-    # 合并normalized_params和defaults，确保所有参数都被包含
-    all_params = defaults.copy()  # 先用defaults作为基础
-    all_params.update(normalized_params)  # 用normalized_params覆盖
+    # 合并normalized_params和defaults，确保所有参数都被包含（normalized_params覆盖defaults）
+    all_params = {**defaults, **normalized_params}
     
     for param_name, param_value in all_params.items():
         # 清理参数名（移除特殊字符，确保是有效的Python标识符）
@@ -397,22 +367,16 @@ def _build_args_spec(task_card: Dict[str, Any], param_map: Dict[str, Any]) -> Di
 
 def _infer_param_type(value: Any) -> str:
     """推断参数类型"""
-    if value is None:
-        return "Any"
-    elif isinstance(value, bool):
-        return "bool"
-    elif isinstance(value, int):
-        return "int"
-    elif isinstance(value, float):
-        return "float"
-    elif isinstance(value, str):
-        return "str"
-    elif isinstance(value, list):
-        return "List"
-    elif isinstance(value, dict):
-        return "Dict"
-    else:
-        return "Any"
+    # 精确类型直接查表（JSON参数的常见情况）
+    type_name = _PARAM_TYPE_NAMES.get(type(value))
+    if type_name is not None:
+        return type_name
+    
+    # 子类（如numpy标量、IntEnum）按原有优先级回退
+    for py_type, name in _PARAM_TYPE_FALLBACKS:
+        if isinstance(value, py_type):
+            return name
+    return "Any"
 
 
 def generate_code_with_cells(task_card: Dict[str, Any], components: List[Dict[str, Any]], param_map: Dict[str, Any]) -> str:
@@ -472,18 +436,17 @@ def _clean_param_name(param_name: str) -> str:
     Returns:
         清理后的参数名
     """
-    import re
-    
     # 移除特殊字符，只保留字母、数字和下划线
-    clean_name = re.sub(r'[^a-zA-Z0-9_]', '_', param_name)
+    clean_name = _INVALID_IDENTIFIER_CHARS.sub('_', param_name)
     
     # 确保以字母或下划线开头
     if clean_name and clean_name[0].isdigit():
         clean_name = f"param_{clean_name}"
     
     # 如果为空或者是Python关键字，使用默认名
-    if not clean_name or clean_name in ['def', 'class', 'import', 'from', 'if', 'else', 'return']:
-        clean_name = f"param_{hash(param_name) % 1000}"
+    if not clean_name or clean_name in _RESERVED_PARAM_NAMES:
+        # crc32与进程无关（内置hash()受PYTHONHASHSEED随机化影响），同一参数名每次生成相同的名字
+        clean_name = f"param_{zlib.crc32(param_name.encode('utf-8')) % 1000}"
     
     return clean_name
 
@@ -170,15 +170,11 @@ class CodeOptimizer:
             self._debug_print(f"📉 合并import语句: 减少{saved_count}个")
         
         # 更新所有cells使用优化后的imports
-        optimized_cells = []
-        for cell in code_cells:
-            cell_copy = cell.copy()
-            # 只在第一个cell中包含所有imports
-            if cell == code_cells[0]:
-                cell_copy['imports'] = optimized_imports
-            else:
-                cell_copy['imports'] = []  # 其他cells清空imports避免重复
-            optimized_cells.append(cell_copy)
+        # 只在第一个cell中包含所有imports，其他cells清空imports避免重复
+        optimized_cells = [
+            {**cell, 'imports': optimized_imports if index == 0 else []}
+            for index, cell in enumerate(code_cells)
+        ]
         
         return optimized_cells
     
@@ -207,14 +203,13 @@ class CodeOptimizer:
         if unused_functions:
             self._debug_print(f"🗑️ 发现未使用函数: {unused_functions}")
             
-            optimized_cells = []
-            for cell in code_cells:
-                cell_copy = cell.copy()
-                cell_copy['helpers'] = [
+            optimized_cells = [
+                {**cell, 'helpers': [
                     helper for helper in cell.get('helpers', [])
                     if self._extract_function_name(helper) not in unused_functions
-                ]
-                optimized_cells.append(cell_copy)
+                ]}
+                for cell in code_cells
+            ]
             
             return optimized_cells
         
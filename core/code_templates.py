@@ -40,9 +40,20 @@ MAIN_FUNCTION_TEMPLATE = '''def main({args}):
 
 ENTRY_POINT_TEMPLATE = '''
 if __name__ == "__main__":
-    main()
+    {main_name}()
 '''
 
+# 默认入口点（main_name为"main"时直接复用，无需每次格式化）
+DEFAULT_ENTRY_POINT = ENTRY_POINT_TEMPLATE.format(main_name="main")
+
+
+# 无默认值参数按类型使用的占位默认值（未列出的类型使用None）
+PARAM_PLACEHOLDER_DEFAULTS = {
+    "int": "0",
+    "float": "0.0",
+    "str": "''",
+}
+
 
 # =============================================================================
 # 模板生成函数
@@ -92,16 +103,8 @@ def main_wrapper(body: str, args_spec: Dict[str, Any]) -> str:
                 optional_args.append(f"{param_name}: {param_type} = {repr(default_value)}")
             else:
                 # 为没有默认值的参数提供合理默认值
-                if param_type == "Any":
-                    optional_args.append(f"{param_name}: {param_type} = None")
-                elif param_type == "int":
-                    optional_args.append(f"{param_name}: {param_type} = 0")
-                elif param_type == "float":
-                    optional_args.append(f"{param_name}: {param_type} = 0.0")
-                elif param_type == "str":
-                    optional_args.append(f"{param_name}: {param_type} = ''")
-                else:
-                    optional_args.append(f"{param_name}: {param_type} = None")
+                placeholder = PARAM_PLACEHOLDER_DEFAULTS.get(param_type, "None")
+                optional_args.append(f"{param_name}: {param_type} = {placeholder}")
                 
             arg_docs_list.append(f"        {param_name}: {description}")
         else:
@@ -135,12 +138,9 @@ def emit_entry(main_name: str = "main") -> str:
     Returns:
         入口点代码
     """
-    if main_name != "main":
-        return f'''
-if __name__ == "__main__":
-    {main_name}()
-'''
-    return ENTRY_POINT_TEMPLATE
+    if main_name == "main":
+        return DEFAULT_ENTRY_POINT
+    return ENTRY_POINT_TEMPLATE.format(main_name=main_name)
 
 
 def generate_param_aliases(param_map: Dict[str, str]) -> str:
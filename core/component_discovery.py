@@ -7,6 +7,7 @@
 
 import json
 import os
+import sys
 from typing import Dict, List, Any
 try:
     from .llm_engine import create_engine
@@ -20,6 +21,36 @@ except ImportError:
     from schemas import ComponentCard
 
 
+def _intern_component_fields(component: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    驻留组件中反复出现的字符串，后续按组件名路由、依赖匹配和参数查找时可走身份比较快路径
+    
+    - name/kind: 组件标识
+    - tags/needs/provides: 依赖匹配用的标签（如 "hamiltonian:pauli_op"，跨组件大量重复）
+    - params_schema的键: 参数名（如 "n"、"reps"，跨组件大量重复）
+    
+    Args:
+        component: 组件字典（原地修改）
+        
+    Returns:
+        同一组件字典
+    """
+    for field in ("name", "kind"):
+        value = component.get(field)
+        if isinstance(value, str):
+            component[field] = sys.intern(value)
+    
+    for field in ("tags", "needs", "provides"):
+        values = component.get(field)
+        if isinstance(values, list):
+            component[field] = [sys.intern(v) if isinstance(v, str) else v for v in values]
+    
+    params_schema = component.get("params_schema")
+    if isinstance(params_schema, dict):
+        component["params_schema"] = {sys.intern(k): v for k, v in params_schema.items()}
+    return component
+
+
 def load_registry() -> List[Dict[str, Any]]:
     """
     加载组件注册表（支持模块化和单文件两种格式）
@@ -47,7 +78,7 @@ def load_registry() -> List[Dict[str, Any]]:
                             all_components.append(module_components)
         
         if all_components:
-            return all_components
+            return [_intern_component_fields(comp) for comp in all_components]
     
     # 回退到单文件registry.json
     registry_path = os.path.join(current_dir, "components", "registry.json")
@@ -55,7 +86,11 @@ def load_registry() -> List[Dict[str, Any]]:
         raise FileNotFoundError(f"组件注册表不存在: {registry_path}")
     
     with open(registry_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        registry_data = json.load(f)
+    
+    if isinstance(registry_data, list):
+        registry_data = [_intern_component_fields(comp) for comp in registry_data]
+    return registry_data
 
 
 def discover(task_card: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -6,16 +6,20 @@ Helper函数动态加载器 - QuantumForge vNext
 
 import ast
 import importlib.util
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Tuple, Set, Optional
 
 
-def _find_helper_files() -> List[Path]:
+@lru_cache(maxsize=None)
+def _find_helper_files() -> Tuple[Path, ...]:
     """
     自动发现项目中的helper文件
     
+    递归glob整个项目树开销较大，且helper文件集合在进程内不变，结果只计算一次。
+    
     Returns:
-        所有helper Python文件的路径列表
+        所有helper Python文件的路径（不可变元组，可安全共享）
     """
     project_root = Path(__file__).parent.parent
     helper_files = []
@@ -37,7 +41,21 @@ def _find_helper_files() -> List[Path]:
             unique_files.append(file_path)
             seen_files.add(file_path)
     
-    return unique_files
+    return tuple(unique_files)
+
+
+@lru_cache(maxsize=None)
+def _parse_helper_file(file_path: Path) -> ast.Module:
+    """
+    解析helper文件为AST（按路径缓存，helper文件在进程内只读取和解析一次）
+    
+    Args:
+        file_path: helper文件路径
+        
+    Returns:
+        模块AST，调用方只读不修改
+    """
+    return ast.parse(file_path.read_text(encoding='utf-8'))
 
 
 def _extract_function_from_file(file_path: Path, function_name: str) -> Optional[object]:
@@ -93,6 +111,35 @@ def load_single_helper(helper_name: str):
         return None
 
 
+@lru_cache(maxsize=128)
+def get_helper_signature(helper_name: str) -> Optional[str]:
+    """
+    通过AST解析获取helper函数签名（不执行helper模块，避免导入qiskit/pyscf等重依赖）
+    
+    helper文件在进程内不变，签名字符串按函数名缓存，重复查询只需一次字典查找。
+    
+    Args:
+        helper_name: helper函数名
+        
+    Returns:
+        函数签名字符串，如 "run_vqe(hamiltonian, ansatz, optimizer, estimator)"，失败时返回None
+    """
+    for file_path in _find_helper_files():
+        try:
+            tree = _parse_helper_file(file_path)
+        except (OSError, SyntaxError, UnicodeDecodeError):
+            continue
+        
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef) and node.name == helper_name:
+                signature = f"{helper_name}({ast.unparse(node.args)})"
+                if node.returns is not None:
+                    signature += f" -> {ast.unparse(node.returns)}"
+                return signature
+    
+    return None
+
+
 def load_helper_functions(helper_stubs: List[str]) -> Tuple[List[str], List[str]]:
     """
     从实际helper文件中加载函数实现
@@ -121,11 +168,8 @@ def load_helper_functions(helper_stubs: List[str]) -> Tuple[List[str], List[str]
         function_found = False
         for helper_file in helper_files:
             try:
-                with open(helper_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # 解析AST
-                tree = ast.parse(content)
+                # 解析AST（缓存）
+                tree = _parse_helper_file(helper_file)
                 
                 # 提取函数定义和导入
                 for node in tree.body:
@@ -9,6 +9,18 @@ from typing import List, Set, Dict
 import re
 
 
+# 类型注解名 -> 对应的typing导入语句（生成代码检测typing依赖时共用）
+PYTHON_TYPE_IMPORTS = {
+    "Dict": "from typing import Dict",
+    "List": "from typing import List",
+    "Optional": "from typing import Optional",
+    "Union": "from typing import Union",
+    "Tuple": "from typing import Tuple",
+    "Any": "from typing import Any",
+    "Callable": "from typing import Callable"
+}
+
+
 class ImportManager:
     """
     Import语句管理器
@@ -5,60 +5,169 @@ LLM引擎 - QuantumForge vNext
 基于new.md第4.2节和第5节的严格JSON规格实现。
 """
 
+import copy
 import json
+import re
 import time
 import asyncio
-from typing import Dict, List, Any, Optional
-from openai import OpenAI, AsyncOpenAI
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 import os
+import sys
 from dotenv import load_dotenv
 try:
     from .performance_monitor import record_agent_call
+    from .cache_manager import CacheManager, CacheConfig
+    from .import_manager import PYTHON_TYPE_IMPORTS
 except ImportError:
     # 直接运行时的兼容处理
-    import sys
     sys.path.append(os.path.dirname(__file__))
     from performance_monitor import record_agent_call
+    from cache_manager import CacheManager, CacheConfig
+    from import_manager import PYTHON_TYPE_IMPORTS
+
+try:
+    from config import CacheSettings
+except ImportError:
+    # 直接运行时项目根目录不在sys.path中
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import CacheSettings
+
+try:
+    # 可选：orjson解析更快，未安装时使用标准库json
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # 加载环境变量
 load_dotenv()
 
+# Agent响应缓存（进程内共享，相同输入直接复用已验证通过的响应；开关和TTL遵循config.CacheSettings）
+_response_cache = CacheManager(CacheConfig(**CacheSettings.get_config_dict()))
 
-class LLMEngine:
+# 是否跳过Agent响应缓存（消融/鲁棒性实验期间由主入口开启，保证每次实验都真实调用Agent）
+_response_cache_bypassed = False
+
+# TaskCard允许的domain取值
+VALID_TASK_DOMAINS = frozenset({
+    "spin", "spin.tfim", "spin.heisenberg", "spin.ising",
+    "chemistry.molecular", "optimization", "custom"
+})
+
+# LLM响应外层的markdown代码块标记（开头的```json与结尾的```分别匹配，结尾缺失或被截断时仍能去掉开头标记）
+_JSON_FENCE_START_PATTERN = re.compile(r"\A\s*```(?:json)?\s*")
+_JSON_FENCE_END_PATTERN = re.compile(r"\s*```\s*\Z")
+
+# invoke代码中常见的错误模式（合并为单个预编译正则）
+_INVALID_INVOKE_PATTERN = re.compile(
+    r'\{.*\}\s*='      # 字典赋值语法 {'n': 'n'} =
+    r'|=\s*\{.*\}$'    # 以字典结尾的赋值 = {'n': 'n'}
+    r'|\[\s*\]\s*='    # 空列表赋值 [] =
+    r'|=\s*\[\s*\]$'   # 以空列表结尾 = []
+)
+
+# 组件名关键字 -> 允许查找的helper文件（领域组件，按顺序匹配）
+_DOMAIN_HELPER_FILES = (
+    (("tfim",), ("tfim_hamiltonian.py", "tfim_hea_circuit.py")),
+    (("heisenberg",), ("heisenberg_hamiltonian.py", "heisenberg_ansatz.py")),
+    (("molecular", "uccsd"), ("molecular_hamiltonian.py", "uccsd_ansatz.py", "molecular_vqe.py")),
+)
+
+# 算法组件关键字及其共用的helper文件
+_ALGORITHM_HELPER_KEYWORDS = ("vqe", "cobyla", "spsa", "estimator")
+_ALGORITHM_HELPER_FILES = ("vqe_templates.py",)
+
+
+@lru_cache(maxsize=256)
+def _helper_files_for_component(component_name: str) -> Tuple[str, ...]:
     """
-    LLM引擎 - 五个Agent API的统一接口
+    单个组件名允许查找的helper文件（纯函数，组件名集合有限，按名称缓存）
     
-    功能：
-    - 严格JSON解析与重试机制
-    - Agent失败检测与优雅降级
-    - 针对每个角色优化的提示词模板
+    Args:
+        component_name: 组件名
+        
+    Returns:
+        允许查找的helper文件名元组
     """
+    name_lower = component_name.lower()
+    files: Tuple[str, ...] = ()
     
-    def __init__(self, api_key: Optional[str] = None, max_retries: int = 3):
-        """
-        初始化LLM引擎
-        
-        Args:
-            api_key: OpenAI API密钥（从环境变量自动获取）
-            max_retries: 最大重试次数
-        """
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self.max_retries = max_retries
-        
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-        
-        # 创建OpenAI客户端（同步和异步）
-        self.client = OpenAI(api_key=self.api_key)
-        self.async_client = AsyncOpenAI(api_key=self.api_key)
-        
-        # Agent提示词模板（基于new.md第5节）
-        self._setup_agent_prompts()
+    # 领域组件：按顺序匹配，命中第一条即止
+    for keywords, domain_files in _DOMAIN_HELPER_FILES:
+        if any(keyword in name_lower for keyword in keywords):
+            files = domain_files
+            break
     
-    def _setup_agent_prompts(self):
-        """设置Agent提示词模板"""
+    # 算法组件允许通用文件
+    if any(keyword in name_lower for keyword in _ALGORITHM_HELPER_KEYWORDS):
+        files += _ALGORITHM_HELPER_FILES
+    
+    return files
+
+
+@lru_cache(maxsize=None)
+def _get_openai_clients(api_key: str) -> Tuple[Any, Any]:
+    """
+    按API密钥创建并缓存OpenAI客户端（同步和异步）
+    
+    各流程阶段都会通过create_engine创建引擎，共享客户端可复用HTTP连接池（keep-alive），
+    避免每个阶段重新建立TCP/TLS连接。
+    openai SDK导入较重，延迟到首次创建引擎时加载；只导入本模块常量/校验逻辑的调用方不受影响。
+    
+    Args:
+        api_key: OpenAI API密钥
         
-        self.semantic_prompt = """You are a quantum computing task analyzer. Parse natural language queries into structured TaskCard JSON format.
+    Returns:
+        (OpenAI客户端, AsyncOpenAI客户端)
+    """
+    from openai import OpenAI, AsyncOpenAI
+    return OpenAI(api_key=api_key), AsyncOpenAI(api_key=api_key)
+
+
+def set_response_cache_bypass(bypass: bool) -> None:
+    """
+    设置是否跳过Agent响应缓存
+    
+    实验模式（消融实验、Agent失效模拟）需要每次真实调用Agent，
+    否则重复查询直接命中内存中的响应，实验的时间和token指标失真。
+    
+    Args:
+        bypass: True时既不读取也不写入Agent响应缓存
+    """
+    global _response_cache_bypassed
+    _response_cache_bypassed = bypass
+
+
+def _get_cached_agent_response(agent_name: str, cache_input: Dict[str, Any]) -> Optional[Any]:
+    """读取Agent响应缓存（跳过缓存时返回None）"""
+    if _response_cache_bypassed:
+        return None
+    return _response_cache.get_cached_agent_response(agent_name, cache_input)
+
+
+def _cache_agent_response(agent_name: str, cache_input: Dict[str, Any], response: Any) -> None:
+    """写入Agent响应缓存（跳过缓存时不写入）"""
+    if not _response_cache_bypassed:
+        _response_cache.cache_agent_response(agent_name, cache_input, response)
+
+
+# 参数补全结果的类型转换表（schema类型名 -> 转换函数）
+_PARAM_COERCERS = {"int": int, "float": float, "str": str}
+
+# 各Agent输出格式的必需字段
+_TASK_CARD_FIELDS = ("domain", "problem", "algorithm", "backend", "params")
+_COMPONENT_CARD_FIELDS = ("name", "kind", "tags", "needs", "provides", "params_schema", "yields", "codegen_hint")
+_PARAM_MAP_FIELDS = ("normalized_params", "aliases", "defaults", "validation_errors")
+_PIPELINE_PLAN_FIELDS = ("execution_order", "dependency_graph", "conflicts")
+_CODE_CELL_FIELDS = ("id", "imports", "helpers", "definitions", "invoke", "exports")
+
+
+# =============================================================================
+# Agent提示词模板（基于new.md第5节）
+# =============================================================================
+
+SEMANTIC_PROMPT = """You are a quantum computing task analyzer. Parse natural language queries into structured TaskCard JSON format.
 
 Required JSON keys: domain, problem, algorithm, backend, params
 - domain: "spin.tfim" | "spin.heisenberg" | "spin.ising" | "chemistry.molecular" | "optimization" | "custom"
@@ -81,7 +190,7 @@ Output: {"domain": "spin", "problem": "ground_state_energy", "algorithm": "vqe",
 Input: "Calculate Heisenberg model ground state with Jx=1.0"  
 Output: {"domain": "spin.heisenberg", "problem": "ground_state_energy", "algorithm": "vqe", "backend": "qiskit", "params": {"Jx": 1.0}}"""
 
-        self.discovery_prompt = """You are a quantum component discovery agent. Select appropriate components from the registry to satisfy TaskCard requirements.
+DISCOVERY_PROMPT = """You are a quantum component discovery agent. Select appropriate components from the registry to satisfy TaskCard requirements.
 
 Based on TaskCard, select components that cover the needs/provides dependency chain.
 Return ComponentCard JSON array format, preserving ALL fields from registry exactly as they appear.
@@ -115,7 +224,7 @@ CRITICAL: Copy ALL fields from registry components exactly, including helper_fun
 
 Output: Complete component objects from registry (preserve all fields)"""
 
-        self.param_norm_prompt = """You are a quantum parameter normalization agent. Generate ParamMap JSON based on TaskCard and ComponentCards.
+PARAM_NORM_PROMPT = """You are a quantum parameter normalization agent. Generate ParamMap JSON based on TaskCard and ComponentCards.
 
 CRITICAL TASK: Collect ALL parameters from BOTH TaskCard AND ComponentCards params_schema fields.
 
@@ -141,7 +250,7 @@ CRITICAL: You must respond with ONLY valid JSON, no explanatory text before or a
 
 Output format: {"normalized_params": {}, "aliases": {}, "defaults": {}, "validation_errors": []}"""
 
-        self.pipeline_prompt = """You are a quantum pipeline orchestration agent. Generate PipelinePlan JSON based on TaskCard, ComponentCards, and ParamMap.
+PIPELINE_PROMPT = """You are a quantum pipeline orchestration agent. Generate PipelinePlan JSON based on TaskCard, ComponentCards, and ParamMap.
 
 Implement linear topological sorting to resolve component dependencies.
 Analyze needs/provides relationships to create proper execution order.
@@ -150,7 +259,7 @@ CRITICAL: You must respond with ONLY valid JSON, no explanatory text before or a
 
 Output format: {"execution_order": ["component_id_list"], "dependency_graph": {}, "conflicts": []}"""
 
-        self.codegen_prompt = """You are a quantum code generation agent. Generate CodeCell list based on PipelinePlan, ComponentCards, and ParamMap.
+CODEGEN_PROMPT = """You are a quantum code generation agent. Generate CodeCell list based on PipelinePlan, ComponentCards, and ParamMap.
 
 Each component corresponds to one CodeCell with imports, helpers, definitions, invoke, and exports.
 
@@ -190,7 +299,7 @@ CRITICAL: You must respond with ONLY valid JSON, no explanatory text before or a
 Output strict JSON array format:
 [{"id": "cell_id", "imports": ["import_statements"], "helpers": ["helper_functions"], "definitions": ["definitions"], "invoke": "invoke_code", "exports": {"variable_mapping"}}]"""
 
-        self.param_completion_prompt = """You are a quantum computing parameter completion expert. Intelligently complete missing parameters based on query analysis and domain expertise.
+PARAM_COMPLETION_PROMPT = """You are a quantum computing parameter completion expert. Intelligently complete missing parameters based on query analysis and domain expertise.
 
 Input context:
 - User query: Natural language description of the quantum computing task
@@ -211,6 +320,78 @@ Use your quantum computing expertise to select the most appropriate values for t
 CRITICAL: You must respond with ONLY valid JSON, no explanatory text before or after.
 
 Output format: {"completed_params": {"param_name": value, ...}, "completion_rationale": "brief explanation"}"""
+
+
+# 所有生成程序共用的基础导入（与组件导入合并后提供给CodegenAgent）
+CODEGEN_BASE_IMPORTS = (
+    "import numpy",
+    "from qiskit.circuit import ParameterVector",
+    "from qiskit.primitives import Estimator",
+    "from qiskit_algorithms import VQE",
+    "from qiskit_algorithms.optimizers import COBYLA"
+)
+
+# CodegenAgent用户消息中与任务无关的固定说明（拼接在动态上下文之后）
+CODEGEN_USER_INSTRUCTIONS = """Please generate corresponding CodeCell for each component, including imports, helpers, definitions, invoke, and exports.
+
+CRITICAL: helpers field must contain complete function definitions (def statements) for all helper functions used in invoke code.
+Use the provided HelperSources for complete function implementations.
+
+CRITICAL IMPORT RULE - COMPONENT-DRIVEN:
+Use ONLY imports from ComponentImports list provided in the user message.
+ComponentImports contains the exact imports needed for the selected components.
+
+- For spin systems (TFIM/Heisenberg): ComponentImports will NOT include qiskit_nature
+- For molecular systems: ComponentImports will include necessary qiskit_nature imports  
+- For algorithms: ComponentImports includes the specific optimizers/primitives needed
+
+Do NOT add any imports beyond ComponentImports list.
+Do NOT use quantum computing knowledge to add "standard" imports.
+ComponentImports is dynamically generated based on selected components - trust it completely.
+
+For example, if invoke uses "H = build_tfim_h(n, hx, j)", copy the complete function from HelperSources.
+
+Use the HelperSignatures to ensure correct function calls with proper parameter order."""
+
+
+class LLMEngine:
+    """
+    LLM引擎 - 五个Agent API的统一接口
+    
+    功能：
+    - 严格JSON解析与重试机制
+    - Agent失败检测与优雅降级
+    - 针对每个角色优化的提示词模板
+    """
+    
+    def __init__(self, api_key: Optional[str] = None, max_retries: int = 3):
+        """
+        初始化LLM引擎
+        
+        Args:
+            api_key: OpenAI API密钥（从环境变量自动获取）
+            max_retries: 最大重试次数
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.max_retries = max_retries
+        
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        
+        # 获取OpenAI客户端（同步和异步），同一API密钥的引擎共享客户端及其连接池
+        self.client, self.async_client = _get_openai_clients(self.api_key)
+        
+        # Agent提示词模板（基于new.md第5节）
+        self._setup_agent_prompts()
+    
+    def _setup_agent_prompts(self):
+        """设置Agent提示词模板（引用模块级常量，不在每个实例上重新构造）"""
+        self.semantic_prompt = SEMANTIC_PROMPT
+        self.discovery_prompt = DISCOVERY_PROMPT
+        self.param_norm_prompt = PARAM_NORM_PROMPT
+        self.pipeline_prompt = PIPELINE_PROMPT
+        self.codegen_prompt = CODEGEN_PROMPT
+        self.param_completion_prompt = PARAM_COMPLETION_PROMPT
     
     def _call_openai(self, system_prompt: str, user_message: str, agent_name: str = None) -> str:
         """
@@ -240,14 +421,13 @@ Output format: {"completed_params": {"param_name": value, ...}, "completion_rati
             
             # 记录性能数据
             if agent_name:
-                input_tokens = response.usage.prompt_tokens if response.usage else 0
-                output_tokens = response.usage.completion_tokens if response.usage else 0
-                record_agent_call(agent_name, system_prompt + user_message, content, call_time, "gpt-4o-mini")
-                
-                # 更新精确的token数据
-                from .performance_monitor import get_monitor
-                metrics = get_monitor().get_agent_metrics(agent_name)
-                metrics.set_tokens(input_tokens, output_tokens)
+                # 优先使用API返回的精确token数据，缺失时才按文本长度估算
+                usage = response.usage
+                record_agent_call(
+                    agent_name, (system_prompt, user_message), content, call_time, "gpt-4o-mini",
+                    input_tokens=usage.prompt_tokens if usage else None,
+                    output_tokens=usage.completion_tokens if usage else None
+                )
             
             return content
         
@@ -295,30 +475,24 @@ Output format: {"completed_params": {"param_name": value, ...}, "completion_rati
         """
         try:
             # 清理响应文本（移除可能的markdown标记）
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith("```json"):
-                cleaned_text = cleaned_text[7:]
-            if cleaned_text.endswith("```"):
-                cleaned_text = cleaned_text[:-3]
-            cleaned_text = cleaned_text.strip()
+            cleaned_text = _JSON_FENCE_START_PATTERN.sub("", response_text, count=1)
+            cleaned_text = _JSON_FENCE_END_PATTERN.sub("", cleaned_text, count=1).strip()
             
-            return json.loads(cleaned_text)
+            return _json_loads(cleaned_text)
         
+        # orjson.JSONDecodeError是json.JSONDecodeError的子类
         except json.JSONDecodeError as e:
             raise ValueError(f"{agent_name} Agent返回了无效的JSON: {str(e)}\n原始响应: {response_text[:200]}...")
     
     def _validate_task_card(self, data: Dict[str, Any]) -> bool:
         """验证TaskCard格式"""
-        required_fields = ["domain", "problem", "algorithm", "backend", "params"]
-        valid_domains = {"spin", "spin.tfim", "spin.heisenberg", "spin.ising", "chemistry.molecular", "optimization", "custom"}
-        
         # 检查必需字段
-        for field in required_fields:
+        for field in _TASK_CARD_FIELDS:
             if field not in data:
                 return False
         
         # 检查domain枚举值
-        if data["domain"] not in valid_domains:
+        if data["domain"] not in VALID_TASK_DOMAINS:
             return False
         
         # 检查backend固定值
@@ -332,12 +506,10 @@ Output format: {"completed_params": {"param_name": value, ...}, "completion_rati
         if not isinstance(data, list):
             return False
         
-        required_fields = ["name", "kind", "tags", "needs", "provides", "params_schema", "yields", "codegen_hint"]
-        
         for card in data:
             if not isinstance(card, dict):
                 return False
-            for field in required_fields:
+            for field in _COMPONENT_CARD_FIELDS:
                 if field not in card:
                     return False
         
@@ -345,9 +517,7 @@ Output format: {"completed_params": {"param_name": value, ...}, "completion_rati
     
     def _validate_param_map(self, data: Dict[str, Any]) -> bool:
         """验证ParamMap格式"""
-        required_fields = ["normalized_params", "aliases", "defaults", "validation_errors"]
-        
-        for field in required_fields:
+        for field in _PARAM_MAP_FIELDS:
             if field not in data:
                 return False
         
@@ -355,9 +525,7 @@ Output format: {"completed_params": {"param_name": value, ...}, "completion_rati
     
     def _validate_pipeline_plan(self, data: Dict[str, Any]) -> bool:
         """验证PipelinePlan格式"""
-        required_fields = ["execution_order", "dependency_graph", "conflicts"]
-        
-        for field in required_fields:
+        for field in _PIPELINE_PLAN_FIELDS:
             if field not in data:
                 return False
         
@@ -372,12 +540,10 @@ Output format: {"completed_params": {"param_name": value, ...}, "completion_rati
         if not isinstance(data, list):
             return False
         
-        required_fields = ["id", "imports", "helpers", "definitions", "invoke", "exports"]
-        
         for cell in data:
             if not isinstance(cell, dict):
                 return False
-            for field in required_fields:
+            for field in _CODE_CELL_FIELDS:
                 if field not in cell:
                     return False
             
@@ -391,19 +557,9 @@ Output format: {"completed_params": {"param_name": value, ...}, "completion_rati
     
     def _validate_invoke_syntax(self, invoke_code: str) -> bool:
         """验证invoke代码的语法正确性"""
-        import re
-        
         # 检查常见的错误模式
-        invalid_patterns = [
-            r'\{.*\}\s*=',  # 字典赋值语法 {'n': 'n'} =
-            r'=\s*\{.*\}$',  # 以字典结尾的赋值 = {'n': 'n'}
-            r'\[\s*\]\s*=',  # 空列表赋值 [] =
-            r'=\s*\[\s*\]$'  # 以空列表结尾 = []
-        ]
-        
-        for pattern in invalid_patterns:
-            if re.search(pattern, invoke_code):
-                return False
+        if _INVALID_INVOKE_PATTERN.search(invoke_code):
+            return False
         
         # 基本语法检查
         try:
@@ -426,12 +582,19 @@ Output format: {"completed_params": {"param_name": value, ...}, "completion_rati
         Returns:
             TaskCard字典
         """
+        cache_input = {"query": query}
+        cached = _get_cached_agent_response("SemanticAgent", cache_input)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         for attempt in range(self.max_retries):
             try:
                 response = self._call_openai(self.semantic_prompt, query, "SemanticAgent")
                 parsed_data = self._parse_json_with_retry(response, "SemanticAgent")
                 
                 if self._validate_task_card(parsed_data):
+                    # 只缓存验证通过的结果，避免重试时命中无效响应
+                    _cache_agent_response("SemanticAgent", cache_input, copy.deepcopy(parsed_data))
                     return parsed_data
                 else:
                     raise ValueError("TaskCard格式验证失败")
@@ -454,19 +617,27 @@ Output format: {"completed_params": {"param_name": value, ...}, "completion_rati
         Returns:
             ComponentCard列表
         """
-        user_message = f"""TaskCard: {json.dumps(task_card, ensure_ascii=False)}
-
-Component Registry:
+        # 注册表（体积大、各查询相同）放在前面，TaskCard放在后面，使不同查询共享消息前缀，便于服务端前缀缓存复用
+        user_message = f"""Component Registry:
 {json.dumps(registry_data, ensure_ascii=False, indent=2)}
 
+TaskCard: {json.dumps(task_card, ensure_ascii=False)}
+
 Please select appropriate components from the registry to satisfy this task requirement."""
         
+        # 以完整的Agent输入（TaskCard + 注册表）作为缓存键
+        cache_input = {"message": user_message}
+        cached = _get_cached_agent_response("DiscoveryAgent", cache_input)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         for attempt in range(self.max_retries):
             try:
                 response = self._call_openai(self.discovery_prompt, user_message, "DiscoveryAgent")
                 parsed_data = self._parse_json_with_retry(response, "DiscoveryAgent")
                 
                 if self._validate_component_cards(parsed_data):
+                    _cache_agent_response("DiscoveryAgent", cache_input, copy.deepcopy(parsed_data))
                     return parsed_data
                 else:
                     raise ValueError("ComponentCards格式验证失败")
@@ -562,11 +733,13 @@ Please generate a linear execution pipeline plan based on component needs/provid
             补全后的参数字典
         """
         user_params = task_card.get("params", {})
-        missing_params = set(required_schema.keys()) - set(user_params.keys())
+        # required_schema为参数需求信息（见collect_component_parameter_requirements），参数名在required_params中
+        required_params = required_schema.get("required_params", {})
+        missing_params = required_params.keys() - user_params.keys()
         
-        # 如果没有缺失参数，直接返回
+        # 用户参数已覆盖全部组件需求：跳过Agent调用，直接返回原任务卡
         if not missing_params:
-            return user_params
+            return task_card
         
         # 构建补全上下文
         user_message = f"""Query: {query}
@@ -579,6 +752,12 @@ Missing Parameters: {list(missing_params)}
 
 Please complete the missing parameters with appropriate quantum computing defaults."""
 
+        # 以完整的Agent输入（查询 + 已有参数 + 需求schema）作为缓存键，缓存验证后的补全参数
+        cache_input = {"message": user_message}
+        cached = _get_cached_agent_response("ParamCompletionAgent", cache_input)
+        if cached is not None:
+            return {**task_card, "params": {**user_params, **copy.deepcopy(cached)}}
+
         for attempt in range(self.max_retries):
             try:
                 response = self._call_openai(self.param_completion_prompt, user_message, "ParamCompletionAgent")
@@ -590,14 +769,12 @@ Please complete the missing parameters with appropriate quantum computing defaul
                 )
                 
                 if validation_result["valid"]:
-                    # 合并用户参数和补全参数
-                    completed_params = user_params.copy()
-                    completed_params.update(validation_result["validated_params"])
+                    _cache_agent_response(
+                        "ParamCompletionAgent", cache_input, copy.deepcopy(validation_result["validated_params"])
+                    )
                     
-                    # 创建新的task_card
-                    completed_task_card = task_card.copy()
-                    completed_task_card["params"] = completed_params
-                    return completed_task_card
+                    # 合并用户参数和补全参数，一次构造新的task_card（不修改原任务卡）
+                    return {**task_card, "params": {**user_params, **validation_result["validated_params"]}}
                 else:
                     raise ValueError("Parameter completion format validation failed")
             
@@ -619,38 +796,34 @@ Please complete the missing parameters with appropriate quantum computing defaul
             函数签名字符串，如 "run_vqe(hamiltonian, ansatz, optimizer, estimator)"
         """
         try:
-            # 尝试从helper文件中加载函数并获取签名
-            from .helper_loader import load_single_helper
-            import inspect
+            # 从helper文件的AST中读取签名，无需导入helper模块本身
+            from .helper_loader import get_helper_signature
             
-            helper_func = load_single_helper(helper_name)
-            if helper_func:
-                sig = inspect.signature(helper_func)
-                return f"{helper_name}{sig}"
+            return get_helper_signature(helper_name)
         except Exception:
             # 如果动态获取失败，返回None让CodegenAgent自己处理
-            pass
-        
-        return None
+            return None
 
-    def _get_helper_source(self, helper_name: str, component_names: list = None) -> str:
+    def _get_helper_source(self, helper_name: str, component_names: list = None, allowed_files: list = None) -> str:
         """
         根据组件类型隔离查找helper函数源代码
         
         Args:
             helper_name: helper函数名
             component_names: 当前使用的组件名列表，用于确定查找范围
+            allowed_files: 预先计算好的允许文件列表（提供时不再根据component_names重新计算）
             
         Returns:
             纯函数定义源代码字符串，不包含文件导入
         """
         try:
-            from .helper_loader import _find_helper_files
+            from .helper_loader import _find_helper_files, _parse_helper_file
             import ast
             import os
             
             # 根据组件类型确定查找范围
-            allowed_files = self._get_allowed_helper_files(component_names)
+            if allowed_files is None:
+                allowed_files = self._get_allowed_helper_files(component_names)
             
             helper_files = _find_helper_files()
             for helper_file in helper_files:
@@ -659,10 +832,7 @@ Please complete the missing parameters with appropriate quantum computing defaul
                 if allowed_files and helper_filename not in allowed_files:
                     continue
                     
-                with open(helper_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                tree = ast.parse(content)
+                tree = _parse_helper_file(helper_file)
                 for node in tree.body:
                     if isinstance(node, ast.FunctionDef) and node.name == helper_name:
                         # 只返回函数定义，避免导入污染
@@ -682,16 +852,6 @@ Please complete the missing parameters with appropriate quantum computing defaul
         Returns:
             set: 需要的typing import语句
         """
-        PYTHON_TYPE_IMPORTS = {
-            "Dict": "from typing import Dict",
-            "List": "from typing import List", 
-            "Optional": "from typing import Optional",
-            "Union": "from typing import Union",
-            "Tuple": "from typing import Tuple",
-            "Any": "from typing import Any",
-            "Callable": "from typing import Callable"
-        }
-        
         needed_imports = set()
         for param_info in params_schema.values():
             param_type = param_info.get("type", "")
@@ -710,16 +870,6 @@ Please complete the missing parameters with appropriate quantum computing defaul
         Returns:
             set: 需要的typing import语句
         """
-        PYTHON_TYPE_IMPORTS = {
-            "Dict": "from typing import Dict",
-            "List": "from typing import List", 
-            "Optional": "from typing import Optional",
-            "Union": "from typing import Union",
-            "Tuple": "from typing import Tuple",
-            "Any": "from typing import Any",
-            "Callable": "from typing import Callable"
-        }
-        
         needed_imports = set()
         
         # 检测类型注解中的typing类型
@@ -742,22 +892,11 @@ Please complete the missing parameters with appropriate quantum computing defaul
         if not component_names:
             return []
             
-        allowed_files = []
+        allowed_files = set()
         for component_name in component_names:
-            if 'tfim' in component_name.lower():
-                allowed_files.extend(['tfim_hamiltonian.py', 'tfim_hea_circuit.py'])
-            elif 'heisenberg' in component_name.lower():
-                allowed_files.extend(['heisenberg_hamiltonian.py', 'heisenberg_ansatz.py'])
-            elif 'molecular' in component_name.lower() or 'uccsd' in component_name.lower():
-                allowed_files.extend(['molecular_hamiltonian.py', 'uccsd_ansatz.py', 'molecular_vqe.py'])
-        
-        # 算法组件允许通用文件
-        for component_name in component_names:
-            if 'vqe' in component_name.lower() or 'cobyla' in component_name.lower() or 'estimator' in component_name.lower():
-                allowed_files.extend(['vqe_templates.py'])
+            allowed_files.update(_helper_files_for_component(component_name))
         
-        # 去重并返回
-        return list(set(allowed_files))
+        return list(allowed_files)
 
     def _validate_parameter_completion(self, completed_params: Dict[str, Any], requirements: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -792,26 +931,15 @@ Please complete the missing parameters with appropriate quantum computing defaul
             expected_type = metadata.get("type")
             param_enum = metadata.get("enum", [])
             
-            # 类型验证
-            if expected_type:
-                if expected_type == "int" and not isinstance(param_value, int):
-                    try:
-                        param_value = int(param_value)
-                    except (ValueError, TypeError):
-                        validation_result["errors"].append(f"参数 {param_name} 应为int类型")
-                        validation_result["valid"] = False
-                        continue
-                        
-                elif expected_type == "float" and not isinstance(param_value, (int, float)):
-                    try:
-                        param_value = float(param_value)
-                    except (ValueError, TypeError):
-                        validation_result["errors"].append(f"参数 {param_name} 应为float类型")
-                        validation_result["valid"] = False
-                        continue
-                        
-                elif expected_type == "str" and not isinstance(param_value, str):
-                    param_value = str(param_value)
+            # 类型验证：直接尝试转换，失败即视为类型错误
+            coerce = _PARAM_COERCERS.get(expected_type)
+            if coerce is not None:
+                try:
+                    param_value = coerce(param_value)
+                except (ValueError, TypeError):
+                    validation_result["errors"].append(f"参数 {param_name} 应为{expected_type}类型")
+                    validation_result["valid"] = False
+                    continue
             
             # 枚举值验证
             if param_enum and param_value not in param_enum:
@@ -819,6 +947,15 @@ Please complete the missing parameters with appropriate quantum computing defaul
                 validation_result["valid"] = False
                 continue
             
+            # 数值范围约束：超出schema范围的补全值截断到边界
+            param_range = metadata.get("range")
+            if param_range and isinstance(param_value, (int, float)):
+                low, high = param_range
+                clamped = min(max(param_value, low), high)
+                if clamped != param_value:
+                    validation_result["warnings"].append(f"参数 {param_name} 值 {param_value} 超出范围 {param_range}，已调整为 {clamped}")
+                    param_value = clamped
+            
             # 验证通过，添加到结果
             validation_result["validated_params"][param_name] = param_value
         
@@ -833,7 +970,8 @@ Please complete the missing parameters with appropriate quantum computing defaul
         
         return validation_result
 
-    def generate_codecells(self, pipeline_plan: Dict[str, Any], components: List[Dict[str, Any]], param_map: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def generate_codecells(self, pipeline_plan: Dict[str, Any], components: List[Dict[str, Any]], param_map: Dict[str, Any],
+                           debug: bool = False) -> List[Dict[str, Any]]:
         """
         Agent 5: 代码生成 - 生成CodeCell列表
         
@@ -841,6 +979,7 @@ Please complete the missing parameters with appropriate quantum computing defaul
             pipeline_plan: 管道计划
             components: 组件列表
             param_map: 参数映射
+            debug: 是否输出helper查找和导入收集的诊断信息
             
         Returns:
             CodeCell列表
@@ -853,15 +992,20 @@ Please complete the missing parameters with appropriate quantum computing defaul
         
         # 获取组件名列表用于隔离查找
         component_names = [c.get("name", "") for c in components]
+        # 允许查找的helper文件只取决于组件集合，整个任务只计算一次
+        allowed_files = self._get_allowed_helper_files(component_names)
         
         # 按照Pipeline执行顺序处理组件
         execution_order = pipeline_plan.get("execution_order", [])
-        ordered_components = []
-        for component_name in execution_order:
-            for comp in components:
-                if comp.get("name") == component_name:
-                    ordered_components.append(comp)
-                    break
+        # 组件名 -> 组件（同名时保留第一个），按执行顺序直接查表
+        components_by_name = {}
+        for comp in components:
+            components_by_name.setdefault(comp.get("name"), comp)
+        ordered_components = [
+            components_by_name[component_name]
+            for component_name in execution_order
+            if component_name in components_by_name
+        ]
         
         # 如果execution_order为空或不完整，fallback到原始顺序
         if len(ordered_components) != len(components):
@@ -871,16 +1015,18 @@ Please complete the missing parameters with appropriate quantum computing defaul
             # 优先使用helper_function字段，fallback到codegen_hint.helper
             helper_name = component.get("helper_function") or component.get("codegen_hint", {}).get("helper")
             if helper_name:
-                print(f"🔍 Looking for helper: {helper_name} (from component: {component.get('name')})")
+                if debug:
+                    print(f"🔍 Looking for helper: {helper_name} (from component: {component.get('name')})")
                 # 从helper文件中动态获取函数签名
                 signature = self._get_helper_signature(helper_name)
                 if signature:
                     helper_signatures[helper_name] = signature
                 # 获取helper函数源代码 (只从相关组件的文件中查找)
-                source_code = self._get_helper_source(helper_name, component_names)
+                source_code = self._get_helper_source(helper_name, allowed_files=allowed_files)
                 if source_code:
                     helper_sources[helper_name] = source_code
-                    print(f"✅ Found helper: {helper_name}")
+                    if debug:
+                        print(f"✅ Found helper: {helper_name}")
                 else:
                     print(f"❌ Missing helper: {helper_name}")
             
@@ -893,22 +1039,19 @@ Please complete the missing parameters with appropriate quantum computing defaul
                         component_imports.add(single_import.strip())
                 else:
                     component_imports.add(import_hint)
-                print(f"📦 Added imports from {component.get('name')}: {import_hint}")
+                if debug:
+                    print(f"📦 Added imports from {component.get('name')}: {import_hint}")
             
             # 自动检测typing imports需求  
             params_schema = component.get("params_schema", {})
             typing_imports = self._detect_typing_imports(params_schema)
-            for typing_import in typing_imports:
-                component_imports.add(typing_import)
-                if typing_imports:
+            if typing_imports:
+                component_imports.update(typing_imports)
+                if debug:
                     print(f"📝 Auto-added typing imports from {component.get('name')}: {', '.join(typing_imports)}")
 
         # 添加基础必需导入
-        component_imports.add("import numpy")
-        component_imports.add("from qiskit.circuit import ParameterVector")
-        component_imports.add("from qiskit.primitives import Estimator")
-        component_imports.add("from qiskit_algorithms import VQE")
-        component_imports.add("from qiskit_algorithms.optimizers import COBYLA")
+        component_imports.update(CODEGEN_BASE_IMPORTS)
         
         
         user_message = f"""PipelinePlan: {json.dumps(pipeline_plan, ensure_ascii=False)}
@@ -923,26 +1066,7 @@ HelperSources: {json.dumps(helper_sources, ensure_ascii=False)}
 
 ComponentImports: {list(component_imports)}
 
-Please generate corresponding CodeCell for each component, including imports, helpers, definitions, invoke, and exports.
-
-CRITICAL: helpers field must contain complete function definitions (def statements) for all helper functions used in invoke code.
-Use the provided HelperSources for complete function implementations.
-
-CRITICAL IMPORT RULE - COMPONENT-DRIVEN:
-Use ONLY imports from ComponentImports list provided in the user message.
-ComponentImports contains the exact imports needed for the selected components.
-
-- For spin systems (TFIM/Heisenberg): ComponentImports will NOT include qiskit_nature
-- For molecular systems: ComponentImports will include necessary qiskit_nature imports  
-- For algorithms: ComponentImports includes the specific optimizers/primitives needed
-
-Do NOT add any imports beyond ComponentImports list.
-Do NOT use quantum computing knowledge to add "standard" imports.
-ComponentImports is dynamically generated based on selected components - trust it completely.
-
-For example, if invoke uses "H = build_tfim_h(n, hx, j)", copy the complete function from HelperSources.
-
-Use the HelperSignatures to ensure correct function calls with proper parameter order."""
+""" + CODEGEN_USER_INSTRUCTIONS
         
         for attempt in range(self.max_retries):
             try:
@@ -993,11 +1117,12 @@ Use the HelperSignatures to ensure correct function calls with proper parameter
     
     async def _discover_components_async(self, task_card: Dict[str, Any], registry_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """异步组件发现"""
+        # 与同步版本相同：静态注册表在前，TaskCard在后
         user_message = f"""
-TaskCard: {json.dumps(task_card, ensure_ascii=False)}
-
 Component Registry: {json.dumps(registry_data, ensure_ascii=False)}
 
+TaskCard: {json.dumps(task_card, ensure_ascii=False)}
+
 Please select appropriate components from the registry based on the TaskCard."""
 
         for attempt in range(self.max_retries):
@@ -1056,9 +1181,15 @@ Please perform initial parameter normalization for the TaskCard parameters, incl
 # 便利函数
 # =============================================================================
 
+# 已创建的引擎实例（按配置复用，LLMEngine本身不保存请求状态）
+_engine_instances: Dict[Tuple[Optional[str], int], LLMEngine] = {}
+
+
 def create_engine(api_key: Optional[str] = None, max_retries: int = 3) -> LLMEngine:
     """
-    创建LLM引擎实例
+    获取LLM引擎实例
+    
+    相同配置只创建一次，后续调用复用同一实例及其OpenAI客户端。
     
     Args:
         api_key: OpenAI API密钥
@@ -1067,7 +1198,12 @@ def create_engine(api_key: Optional[str] = None, max_retries: int = 3) -> LLMEng
     Returns:
         LLMEngine实例
     """
-    return LLMEngine(api_key=api_key, max_retries=max_retries)
+    key = (api_key, max_retries)
+    engine = _engine_instances.get(key)
+    if engine is None:
+        engine = LLMEngine(api_key=api_key, max_retries=max_retries)
+        _engine_instances[key] = engine
+    return engine
 
 
 # =============================================================================
@@ -21,6 +21,13 @@ except ImportError:
 # 组件驱动的参数发现架构
 # AI智能参数补全系统
 
+# schema类型名 -> 允许的Python类型（float参数同样接受int）
+_SCHEMA_PY_TYPES = {
+    "int": int,
+    "float": (int, float),
+    "str": str
+}
+
 
 def normalize(task_card: Dict[str, Any], components: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -61,21 +68,10 @@ def _apply_local_enhancements(param_map: Dict[str, Any], task_card: Dict[str, An
     original_params = task_card.get("params", {})
     normalized_params = param_map.get("normalized_params", {})
     
-    # 应用全局别名
-    final_params = {}
-    applied_aliases = {}
-    
-    for param_name, param_value in original_params.items():
-        # 直接使用参数名，不做别名转换（将由组件schema驱动）
-        final_params[param_name] = param_value
-    
-    # 合并Agent的归一化结果
+    # 以原始参数为基础（不做别名转换，将由组件schema驱动），再补入Agent的归一化结果
+    final_params = dict(original_params)
     for param_name, param_value in normalized_params.items():
-        if param_name not in final_params:
-            final_params[param_name] = param_value
-    
-    # 默认值现在由AI智能补全，不再使用硬编码
-    applied_defaults = {}
+        final_params.setdefault(param_name, param_value)
     
     # 错误处理：检查组件格式
     if not components:
@@ -87,34 +83,31 @@ def _apply_local_enhancements(param_map: Dict[str, Any], task_card: Dict[str, An
         }
         return enhanced_map
     
-    # 为nullable参数设置None默认值
+    # 默认值现在由AI智能补全，不再使用硬编码；在Agent默认值的副本上直接补入nullable参数
+    defaults = dict(param_map.get("defaults", {}))
+    
+    # 单次遍历组件schema：收集所需参数，同时为nullable参数设置None默认值
+    required_params = set()
     for comp in components:
-        params_schema = comp.get("params_schema", {})
-        for param_name, param_info in params_schema.items():
+        for param_name, param_info in comp.get("params_schema", {}).items():
+            required_params.add(param_name)
             # 检查param_info是否为字典类型
             if isinstance(param_info, dict) and param_info.get("nullable") and param_name not in final_params:
                 final_params[param_name] = None
-                applied_defaults[param_name] = None
-    
-    # 收集组件所需的参数
-    required_params = set()
-    for comp in components:
-        params_schema = comp.get("params_schema", {})
-        required_params.update(params_schema.keys())
+                defaults[param_name] = None
     
     # 验证参数完整性
-    missing_params = []
-    for required_param in required_params:
-        if required_param not in final_params:
-            missing_params.append(required_param)
+    missing_params = [p for p in required_params if p not in final_params]
+    validation_errors = list(param_map.get("validation_errors", []))
+    if missing_params:
+        validation_errors.append(f"Missing required parameters: {missing_params}")
     
-    # 构建增强的ParamMap
+    # 构建增强的ParamMap（本地不产生新别名，直接复制Agent别名）
     enhanced_map = {
         "normalized_params": final_params,
-        "aliases": {**param_map.get("aliases", {}), **applied_aliases},
-        "defaults": {**param_map.get("defaults", {}), **applied_defaults},
-        "validation_errors": param_map.get("validation_errors", []) + 
-                           ([f"Missing required parameters: {missing_params}"] if missing_params else [])
+        "aliases": dict(param_map.get("aliases", {})),
+        "defaults": defaults,
+        "validation_errors": validation_errors
     }
     
     return enhanced_map
@@ -167,16 +160,12 @@ def validate_param_types(params: Dict[str, Any], components: List[Dict[str, Any]
     
     # 验证每个参数的类型
     for param_name, param_value in params.items():
-        if param_name in type_requirements:
-            expected_type = type_requirements[param_name]
-            
-            # 基础类型检查
-            if expected_type == "int" and not isinstance(param_value, int):
-                errors.append(f"参数 {param_name} 应为int类型，实际为{type(param_value).__name__}")
-            elif expected_type == "float" and not isinstance(param_value, (int, float)):
-                errors.append(f"参数 {param_name} 应为float类型，实际为{type(param_value).__name__}")
-            elif expected_type == "str" and not isinstance(param_value, str):
-                errors.append(f"参数 {param_name} 应为str类型，实际为{type(param_value).__name__}")
+        expected_type = type_requirements.get(param_name)
+        
+        # 基础类型检查（查表一次，未知类型不检查）
+        py_types = _SCHEMA_PY_TYPES.get(expected_type)
+        if py_types is not None and not isinstance(param_value, py_types):
+            errors.append(f"参数 {param_name} 应为{expected_type}类型，实际为{type(param_value).__name__}")
     
     return errors
 
@@ -8,6 +8,29 @@
 from typing import Dict, List, Any, Set, Optional
 
 
+# 简化格式参数规格（非字典）的元数据模板
+_SIMPLE_PARAM_METADATA = {
+    "source_component": "",
+    "type": "",
+    "description": "",
+    "required": True,
+    "nullable": False,
+    "enum": [],
+    "range": None
+}
+
+# 参数schema允许的类型（完整格式 / 简化格式）
+_VALID_PARAM_TYPES = frozenset({"int", "float", "str", "bool", "list", "dict"})
+_VALID_SIMPLE_PARAM_TYPES = frozenset({"int", "float", "str", "bool"})
+
+# 参数语义分类表（按顺序匹配参数名中的关键字）
+_SEMANTIC_CATEGORY_KEYWORDS = (
+    ("computational", ("optimizer", "maxiter", "reps", "seed")),
+    ("physical", ("hx", "j", "coupling", "field", "energy")),
+    ("algorithmic", ("algorithm", "method", "strategy"))
+)
+
+
 def collect_component_parameter_requirements(components: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     从选中组件动态收集参数需求schema
@@ -30,20 +53,28 @@ def collect_component_parameter_requirements(components: List[Dict[str, Any]]) -
             # 收集参数规格
             required_params[param_name] = param_spec
             
-            # 构建参数元数据
-            param_metadata[param_name] = {
-                "source_component": component_name,
-                "type": param_spec.get("type") if isinstance(param_spec, dict) else str(param_spec),
-                "description": param_spec.get("description", "") if isinstance(param_spec, dict) else "",
-                "required": not param_spec.get("nullable", False) if isinstance(param_spec, dict) else True,
-                "nullable": param_spec.get("nullable", False) if isinstance(param_spec, dict) else False,
-                "enum": param_spec.get("enum", []) if isinstance(param_spec, dict) else []
-            }
+            # 构建参数元数据（每个参数只做一次类型判断）
+            if isinstance(param_spec, dict):
+                nullable = param_spec.get("nullable", False)
+                metadata = {
+                    "source_component": component_name,
+                    "type": param_spec.get("type"),
+                    "description": param_spec.get("description", ""),
+                    "required": not nullable,
+                    "nullable": nullable,
+                    "enum": param_spec.get("enum", []),
+                    "range": param_spec.get("range")
+                }
+            else:
+                # 简化格式（如 "int"）：从模板复制固定字段
+                metadata = _SIMPLE_PARAM_METADATA.copy()
+                metadata["source_component"] = component_name
+                metadata["type"] = str(param_spec)
+                metadata["enum"] = []
+            param_metadata[param_name] = metadata
             
             # 跟踪参数来源组件
-            if param_name not in component_sources:
-                component_sources[param_name] = []
-            component_sources[param_name].append(component_name)
+            component_sources.setdefault(param_name, []).append(component_name)
     
     return {
         "required_params": required_params,
@@ -97,15 +128,13 @@ def categorize_parameters(required_params: Dict[str, Any], param_metadata: Dict[
         else:
             categorized["optional"].append(param_name)
         
-        # 按语义分类 (基于参数名模式)
+        # 按语义分类 (基于参数名模式，命中第一类即止)
         param_lower = param_name.lower()
         
-        if any(keyword in param_lower for keyword in ["optimizer", "maxiter", "reps", "seed"]):
-            categorized["computational"].append(param_name)
-        elif any(keyword in param_lower for keyword in ["hx", "j", "coupling", "field", "energy"]):
-            categorized["physical"].append(param_name)
-        elif any(keyword in param_lower for keyword in ["algorithm", "method", "strategy"]):
-            categorized["algorithmic"].append(param_name)
+        for category, keywords in _SEMANTIC_CATEGORY_KEYWORDS:
+            if any(keyword in param_lower for keyword in keywords):
+                categorized[category].append(param_name)
+                break
     
     return categorized
 
@@ -139,15 +168,13 @@ def validate_parameter_schema(components: List[Dict[str, Any]]) -> List[str]:
                     errors.append(f"Parameter {param_name} in {component_name} missing 'type' field")
                 
                 # 检查类型有效性
-                valid_types = {"int", "float", "str", "bool", "list", "dict"}
                 param_type = param_spec.get("type")
-                if param_type not in valid_types:
+                if param_type not in _VALID_PARAM_TYPES:
                     errors.append(f"Parameter {param_name} in {component_name} has invalid type: {param_type}")
             
             elif isinstance(param_spec, str):
                 # 简化格式支持
-                valid_simple_types = {"int", "float", "str", "bool"}
-                if param_spec not in valid_simple_types:
+                if param_spec not in _VALID_SIMPLE_PARAM_TYPES:
                     errors.append(f"Parameter {param_name} in {component_name} has invalid simple type: {param_spec}")
             
             else:
@@ -9,13 +9,17 @@ import time
 import json
 import uuid
 from functools import wraps
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Optional, Sequence, Union
 from datetime import datetime
 
 
 class AgentMetrics:
     """Agent性能指标数据类"""
     
+    # 每次Agent调用都会创建实例，使用__slots__省去实例__dict__
+    __slots__ = ("agent_name", "input_tokens", "output_tokens", "call_time",
+                 "model", "start_time", "end_time")
+    
     def __init__(self, agent_name: str):
         self.agent_name = agent_name
         self.input_tokens = 0
@@ -35,6 +39,12 @@ class AgentMetrics:
             self.end_time = time.time()
             self.call_time = self.end_time - self.start_time
     
+    def record_timing(self, start_time: float, end_time: float):
+        """一次性记录完整的调用区间"""
+        self.start_time = start_time
+        self.end_time = end_time
+        self.call_time = end_time - start_time
+    
     def set_tokens(self, input_tokens: int, output_tokens: int):
         """设置token消耗"""
         self.input_tokens = input_tokens
@@ -64,6 +74,7 @@ class PerformanceMonitor:
         self.agents = {}
         self.start_time = None
         self.end_time = None
+        self.cache_hit = False
     
     def start_query(self, query: str):
         """开始监控一次查询"""
@@ -71,11 +82,16 @@ class PerformanceMonitor:
         self.query = query
         self.agents = {}
         self.start_time = time.time()
+        self.cache_hit = False
     
     def end_query(self):
         """结束查询监控"""
         self.end_time = time.time()
     
+    def mark_cache_hit(self):
+        """标记本次查询由查询结果缓存直接返回"""
+        self.cache_hit = True
+    
     def get_agent_metrics(self, agent_name: str) -> AgentMetrics:
         """获取或创建Agent指标对象"""
         if agent_name not in self.agents:
@@ -84,9 +100,13 @@ class PerformanceMonitor:
     
     def get_total_metrics(self) -> Dict[str, Any]:
         """获取总体指标"""
-        total_input = sum(metrics.input_tokens for metrics in self.agents.values())
-        total_output = sum(metrics.output_tokens for metrics in self.agents.values())
-        total_time = sum(metrics.call_time for metrics in self.agents.values())
+        # 单次遍历累加三项指标
+        total_input = total_output = 0
+        total_time = 0.0
+        for metrics in self.agents.values():
+            total_input += metrics.input_tokens
+            total_output += metrics.output_tokens
+            total_time += metrics.call_time
         
         return {
             "total_input_tokens": total_input,
@@ -107,6 +127,7 @@ class PerformanceMonitor:
             "query_id": self.query_id,
             "query": self.query,
             "timestamp": datetime.now().isoformat(),
+            "cache_hit": self.cache_hit,
             "agents": agent_data,
             "totals": self.get_total_metrics()
         }
@@ -134,60 +155,64 @@ def agent_monitor(agent_name: str):
             monitor = get_monitor()
             metrics = monitor.get_agent_metrics(agent_name)
             
-            # 开始计时
-            metrics.start_timing()
+            # 开始计时（计时状态保存在局部变量中，并发调用同一Agent时互不覆盖）
+            start_time = time.time()
             
             try:
                 # 调用原始函数
                 result = func(*args, **kwargs)
-                
-                # 结束计时
-                metrics.end_timing()
-                
-                # 尝试从结果中提取token信息（如果可用）
-                if isinstance(result, dict) and "usage" in result:
-                    usage = result["usage"]
-                    metrics.set_tokens(
-                        usage.get("prompt_tokens", 0),
-                        usage.get("completion_tokens", 0)
-                    )
-                
-                return result
-                
-            except Exception as e:
+            finally:
                 # 即使出错也要记录时间
-                metrics.end_timing()
-                raise e
+                metrics.record_timing(start_time, time.time())
+            
+            # 尝试从结果中提取token信息（如果可用）
+            if isinstance(result, dict) and "usage" in result:
+                usage = result["usage"]
+                metrics.set_tokens(
+                    usage.get("prompt_tokens", 0),
+                    usage.get("completion_tokens", 0)
+                )
+            
+            return result
         
         return wrapper
     return decorator
 
 
-def estimate_tokens(text: str) -> int:
+def estimate_tokens(text: Union[str, Sequence[str]]) -> int:
     """
     估算文本的token数量
     简单估算：1 token ≈ 4 characters (for GPT models)
+    
+    text可以是多段文本（如 (system_prompt, user_message)），按总长度估算，无需先拼接
     """
-    return len(text) // 4
+    if isinstance(text, str):
+        return len(text) // 4
+    return sum(len(part) for part in text) // 4
 
 
-def record_agent_call(agent_name: str, input_text: str, output_text: str, call_time: float, model: str = "gpt-4"):
+def record_agent_call(agent_name: str, input_text: Union[str, Sequence[str]], output_text: str, call_time: float,
+                      model: str = "gpt-4", input_tokens: Optional[int] = None, output_tokens: Optional[int] = None):
     """
     手动记录Agent调用数据
     
     Args:
         agent_name: Agent名称
-        input_text: 输入文本
+        input_text: 输入文本（单个字符串或多段文本）
         output_text: 输出文本
         call_time: 调用时间（秒）
         model: 使用的模型名称
+        input_tokens: API返回的精确输入token数（未提供时按文本估算）
+        output_tokens: API返回的精确输出token数（未提供时按文本估算）
     """
     monitor = get_monitor()
     metrics = monitor.get_agent_metrics(agent_name)
     
-    # 估算token消耗
-    input_tokens = estimate_tokens(input_text)
-    output_tokens = estimate_tokens(output_text)
+    # 估算token消耗（有精确值时直接使用）
+    if input_tokens is None:
+        input_tokens = estimate_tokens(input_text)
+    if output_tokens is None:
+        output_tokens = estimate_tokens(output_text)
     
     # 记录数据
     metrics.set_tokens(input_tokens, output_tokens)
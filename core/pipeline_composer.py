@@ -5,6 +5,7 @@
 基于new.md第4.6节规格和PipelinePlan架构实现。
 """
 
+from collections import deque
 from typing import Dict, List, Any, Set
 try:
     from .llm_engine import create_engine
@@ -110,28 +111,30 @@ def topological_sort(dependency_graph: Dict[str, List[str]], provides_map: Dict[
     
     # Kahn算法进行拓扑排序
     in_degree = {comp: 0 for comp in dependency_graph.keys()}
+    # 反向邻接表 {组件名: [依赖它的组件]}，出队时只访问真正的后继
+    dependents = {comp: [] for comp in dependency_graph.keys()}
     
     # 计算入度
     for comp_name, deps in component_deps.items():
         for dep in deps:
             if dep in in_degree:
                 in_degree[comp_name] += 1
+                dependents[dep].append(comp_name)
     
     # 初始化队列（入度为0的节点）
-    queue = [comp for comp, degree in in_degree.items() if degree == 0]
+    queue = deque(comp for comp, degree in in_degree.items() if degree == 0)
     result = []
     
     while queue:
         # 取出一个入度为0的节点
-        current = queue.pop(0)
+        current = queue.popleft()
         result.append(current)
         
         # 更新相邻节点的入度
-        for comp_name, deps in component_deps.items():
-            if current in deps:
-                in_degree[comp_name] -= 1
-                if in_degree[comp_name] == 0:
-                    queue.append(comp_name)
+        for comp_name in dependents[current]:
+            in_degree[comp_name] -= 1
+            if in_degree[comp_name] == 0:
+                queue.append(comp_name)
     
     # 检查是否有环
     if len(result) != len(dependency_graph):
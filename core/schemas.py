@@ -16,6 +16,11 @@ from dataclasses import dataclass, asdict
 import json
 
 
+# TaskCard.domain允许的取值
+VALID_DOMAINS = frozenset({"spin", "chemistry", "optimization", "custom"})
+
+# 以下数据类字段均无默认值，直接声明__slots__，实例不再携带__dict__
+
 @dataclass
 class TaskCard:
     """
@@ -23,6 +28,8 @@ class TaskCard:
     
     由SemanticAgent从自然语言query生成
     """
+    __slots__ = ("domain", "problem", "algorithm", "backend", "params")
+    
     domain: str                    # "spin" | "chemistry" | "optimization" | "custom"
     problem: str                   # 自由命名：如 "tfim_ground_energy"
     algorithm: str                 # "vqe" | "qaoa" | "qpe" | "vqd" | "vqls" | ...
@@ -56,6 +63,8 @@ class ComponentCard:
     
     从registry.json读取，由DiscoveryAgent筛选返回
     """
+    __slots__ = ("name", "kind", "tags", "needs", "provides", "params_schema", "yields", "codegen_hint")
+    
     name: str                      # "Hamiltonian.TFIM"
     kind: str                      # "hamiltonian" | "ansatz" | "primitive" | "optimizer" | "algorithm" | "reporter"
     tags: List[str]                # ["spin", "tfim"]
@@ -90,6 +99,8 @@ class ParamMap:
     
     由ParamNormAgent生成，用于参数标准化
     """
+    __slots__ = ("aliases", "defaults", "validated")
+    
     aliases: Dict[str, str]        # {"num_qubits": "n", "h_x": "hx"}
     defaults: Dict[str, Any]       # {"optimizer": "COBYLA", "reps": 2}
     validated: List[str]           # ["n", "hx", "j", "reps", "optimizer"]
@@ -117,6 +128,8 @@ class PipelineStep:
     """
     流水线步骤 - 单个组件的执行配置
     """
+    __slots__ = ("use", "with_params")
+    
     use: str                       # 组件名："Hamiltonian.TFIM"
     with_params: Dict[str, str]    # 参数绑定：{"n": "$n", "hx": "$hx"}
     
@@ -137,6 +150,8 @@ class PipelinePlan:
     
     由PipelineAgent通过拓扑排序生成
     """
+    __slots__ = ("steps",)
+    
     steps: List[PipelineStep]      # 执行步骤列表
     
     def to_dict(self) -> Dict[str, Any]:
@@ -168,6 +183,8 @@ class CodeCell:
     
     由CodegenAgent生成，存储在Memory中
     """
+    __slots__ = ("id", "imports", "helpers", "definitions", "invoke", "exports")
+    
     id: str                        # 唯一标识："ham_tfim"
     imports: List[str]             # import语句列表
     helpers: List[str]             # 辅助函数定义
@@ -207,8 +224,7 @@ def validate_task_card(data: Dict[str, Any]) -> bool:
             return False
     
     # 检查枚举值
-    valid_domains = ["spin", "chemistry", "optimization", "custom"]
-    if data["domain"] not in valid_domains:
+    if data["domain"] not in VALID_DOMAINS:
         return False
     
     # 检查params是字典
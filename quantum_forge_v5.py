@@ -14,9 +14,65 @@ from core.parameter_matcher import normalize as normalize_params
 from core.pipeline_composer import compose as compose_pipeline
 from core.execution_memory import create as create_memory
 from core.code_assembler import assemble as assemble_code
-from core.llm_engine import create_engine
+from core.llm_engine import create_engine, set_response_cache_bypass
 from core.schemas import CodeCell
-from core.performance_monitor import get_monitor
+from core.performance_monitor import get_monitor, PerformanceMonitor
+from core.cache_manager import CacheManager, CacheConfig
+from config import CacheSettings
+
+
+# 完整查询结果缓存（相同查询 + TaskCard 直接返回已生成的代码）
+_result_cache = CacheManager(CacheConfig(**CacheSettings.get_config_dict()))
+
+# 调试配置默认值（dict形式的debug参数在此基础上覆盖）
+_DEBUG_DEFAULTS = {"steps": False, "agents": False, "performance": False}
+
+
+def _resolve_debug_config(debug) -> Dict[str, bool]:
+    """将debug参数（bool或dict）统一为完整的调试配置字典"""
+    if isinstance(debug, bool):
+        return {"steps": debug, "agents": False, "performance": debug}
+    return {**_DEBUG_DEFAULTS, **debug}
+
+
+def _finish_run(final_code: str, start_time: float, monitor: PerformanceMonitor, debug_config: Dict[str, bool]) -> str:
+    """
+    run()的统一收尾：结束性能监控并输出耗时和Agent统计（正常生成与缓存命中共用）
+    
+    Args:
+        final_code: 生成（或缓存命中）的代码
+        start_time: run()开始时间
+        monitor: 性能监控器
+        debug_config: 调试配置
+        
+    Returns:
+        final_code
+    """
+    # 计算执行时间
+    execution_time = time.time() - start_time
+    
+    # 结束性能监控
+    monitor.end_query()
+    
+    if debug_config["steps"]:
+        if monitor.cache_hit:
+            print(f"🚀 缓存命中：直接返回缓存结果")
+        print(f"\n✅ 代码生成完成!")
+        print(f"⏱️ 执行时间: {execution_time:.2f}秒")
+        print(f"📏 代码长度: {len(final_code)}字符")
+        
+    if debug_config["performance"]:
+        # 显示Agent性能统计
+        metrics = monitor.export_metrics()
+        print(f"\n📊 Agent性能统计:")
+        for agent_name, agent_metrics in metrics["agents"].items():
+            print(f"  {agent_name}: {agent_metrics['input_tokens']}+{agent_metrics['output_tokens']}={agent_metrics['total_tokens']}tokens, {agent_metrics['call_time']}s")
+        totals = metrics["totals"]
+        print(f"  总计: {totals['total_tokens']}tokens, {totals['total_agent_time']}s")
+        if metrics["cache_hit"]:
+            print(f"  查询结果缓存命中")
+    
+    return final_code
 
 
 def run(query: str, debug=False, max_retries: int = 3, experiment_config: Dict[str, Any] = None) -> str:
@@ -39,31 +95,39 @@ def run(query: str, debug=False, max_retries: int = 3, experiment_config: Dict[s
     start_time = time.time()
     
     # 处理调试配置
-    if isinstance(debug, bool):
-        debug_config = {"steps": debug, "agents": False, "performance": debug}
-    else:
-        debug_config = {
-            "steps": debug.get("steps", False),
-            "agents": debug.get("agents", False), 
-            "performance": debug.get("performance", False)
-        }
+    debug_config = _resolve_debug_config(debug)
     
     # 初始化性能监控
     monitor = get_monitor()
     monitor.start_query(query)
     
+    # 显式传入实验配置即为实验运行（消融/鲁棒性实验），需要每次真实调用Agent
+    experiment_mode = experiment_config is not None
+    
     # 加载实验配置
     if experiment_config is None:
         from config import ExperimentSettings
         experiment_config = ExperimentSettings.get_experiment_config()
     
+    # 实验配置在整个流程中只读，各开关只解析一次
+    ai_completion_config = experiment_config.get("ai_completion", {})
+    robustness_config = experiment_config.get("robustness", {})
+    ai_completion_enabled = ai_completion_config.get("enabled", True)
+    # 模拟失效的Agent名（未开启失效模拟时为None）
+    failed_agent = robustness_config.get("failed_agent") if robustness_config.get("simulate_failure") else None
+    
+    # 缓存（查询结果 + Agent响应）只用于常规运行：实验运行和消融/失效模拟会改变生成结果，
+    # 命中缓存还会让实验的时间和token指标失真
+    use_cache = not experiment_mode and ai_completion_enabled and not robustness_config.get("simulate_failure")
+    set_response_cache_bypass(not use_cache)
+    
     if debug_config["steps"]:
         print(f"🚀 QuantumForge vNext 启动")
         print(f"📝 查询: {query}")
-        if experiment_config.get("ai_completion", {}).get("enabled") == False:
+        if ai_completion_config.get("enabled") == False:
             print(f"🧪 实验模式: AI参数补全已禁用")
-        if experiment_config.get("robustness", {}).get("simulate_failure"):
-            print(f"🧪 实验模式: 模拟{experiment_config['robustness']['failed_agent']}Agent失效")
+        if robustness_config.get("simulate_failure"):
+            print(f"🧪 实验模式: 模拟{robustness_config['failed_agent']}Agent失效")
     
     try:
         # Step 1: 语义理解 - Query → TaskCard
@@ -75,16 +139,23 @@ def run(query: str, debug=False, max_retries: int = 3, experiment_config: Dict[s
         if debug_config["steps"]:
             print(f"📋 TaskCard: {task_card['domain']}.{task_card['problem']}.{task_card['algorithm']}")
         
+        # 查询结果缓存
+        if use_cache:
+            cached_code = _result_cache.get_cached_query_result(query, task_card)
+            if cached_code:
+                # 缓存命中同样经过统一的收尾流程（性能监控、耗时统计）
+                monitor.mark_cache_hit()
+                return _finish_run(cached_code, start_time, monitor, debug_config)
+        
         # Step 2: 组件发现 - TaskCard → ComponentCards
         if debug_config["steps"]:
             print(f"\n🔍 Step 2: 组件发现...")
         
         # 检查是否模拟DiscoveryAgent失效
-        if (experiment_config.get("robustness", {}).get("simulate_failure") and 
-            experiment_config.get("robustness", {}).get("failed_agent") == "discovery"):
+        if failed_agent == "discovery":
             # 模拟组件发现失效，使用基线组件
             from core.component_discovery import get_registry_components_by_names
-            baseline_names = experiment_config.get("robustness", {}).get("baseline_components", [])
+            baseline_names = robustness_config.get("baseline_components", [])
             components = get_registry_components_by_names(baseline_names)
             if debug_config["agents"]:
                 print(f"🧪 模拟DiscoveryAgent失效，使用基线组件: {[comp['name'] for comp in components]}")
@@ -110,7 +181,7 @@ def run(query: str, debug=False, max_retries: int = 3, experiment_config: Dict[s
         engine = create_engine(max_retries=max_retries)
         
         # 检查是否启用AI参数补全 (消融实验控制)
-        if experiment_config.get("ai_completion", {}).get("enabled", True):
+        if ai_completion_enabled:
             completed_task_card = engine.complete_parameters(query, task_card, param_requirements)
             
             if debug_config["agents"]:
@@ -128,8 +199,7 @@ def run(query: str, debug=False, max_retries: int = 3, experiment_config: Dict[s
             print(f"\n🔧 Step 5: 参数归一化...")
         
         # 检查是否模拟ParamNormAgent失效
-        if (experiment_config.get("robustness", {}).get("simulate_failure") and 
-            experiment_config.get("robustness", {}).get("failed_agent") == "param_norm"):
+        if failed_agent == "param_norm":
             # 模拟参数归一化失效，使用简单fallback
             param_map = {
                 "normalized_params": completed_task_card.get("params", {}),
@@ -150,8 +220,7 @@ def run(query: str, debug=False, max_retries: int = 3, experiment_config: Dict[s
             print(f"\n📊 Step 6: 管道编排...")
         
         # 检查是否模拟PipelineAgent失效
-        if (experiment_config.get("robustness", {}).get("simulate_failure") and 
-            experiment_config.get("robustness", {}).get("failed_agent") == "pipeline"):
+        if failed_agent == "pipeline":
             # 模拟管道编排失效，使用简单fallback
             pipeline_plan = {
                 "execution_order": [comp["name"] for comp in components],
@@ -175,7 +244,7 @@ def run(query: str, debug=False, max_retries: int = 3, experiment_config: Dict[s
         memory = create_memory()
         
         # 调用CodegenAgent生成CodeCells
-        code_cells_data = engine.generate_codecells(pipeline_plan, components, param_map)
+        code_cells_data = engine.generate_codecells(pipeline_plan, components, param_map, debug=debug_config["agents"])
         
         # 转换为CodeCell对象并添加到Memory
         for cell_data in code_cells_data:
@@ -198,27 +267,10 @@ def run(query: str, debug=False, max_retries: int = 3, experiment_config: Dict[s
         
         final_code = assemble_code(memory, pipeline_plan, task_card, param_map)
         
-        # 计算执行时间
-        execution_time = time.time() - start_time
-        
-        # 结束性能监控
-        monitor.end_query()
-        
-        if debug_config["steps"]:
-            print(f"\n✅ 代码生成完成!")
-            print(f"⏱️ 执行时间: {execution_time:.2f}秒")
-            print(f"📏 代码长度: {len(final_code)}字符")
-            
-        if debug_config["performance"]:
-            # 显示Agent性能统计
-            metrics = monitor.export_metrics()
-            print(f"\n📊 Agent性能统计:")
-            for agent_name, agent_metrics in metrics["agents"].items():
-                print(f"  {agent_name}: {agent_metrics['input_tokens']}+{agent_metrics['output_tokens']}={agent_metrics['total_tokens']}tokens, {agent_metrics['call_time']}s")
-            totals = metrics["totals"]
-            print(f"  总计: {totals['total_tokens']}tokens, {totals['total_agent_time']}s")
+        if use_cache:
+            _result_cache.cache_query_result(query, task_card, final_code)
         
-        return final_code
+        return _finish_run(final_code, start_time, monitor, debug_config)
     
     except Exception as e:
         execution_time = time.time() - start_time
@@ -228,6 +280,10 @@ def run(query: str, debug=False, max_retries: int = 3, experiment_config: Dict[s
             print(f"❌ {error_msg}")
         
         raise RuntimeError(error_msg)
+    
+    finally:
+        # 恢复Agent响应缓存，避免实验运行的设置影响后续调用
+        set_response_cache_bypass(False)
 
 
 def run_and_save(query: str, output_file: str = None, debug=True, max_retries: int = 3) -> str:
@@ -244,10 +300,7 @@ def run_and_save(query: str, output_file: str = None, debug=True, max_retries: i
         生成的代码内容
     """
     # 处理调试配置
-    if isinstance(debug, bool):
-        debug_config = {"steps": debug, "agents": False, "performance": debug}
-    else:
-        debug_config = debug
+    debug_config = _resolve_debug_config(debug)
     
     # 生成代码
     code = run(query, debug=debug, max_retries=max_retries)
@@ -289,10 +342,7 @@ def run_with_metrics(query: str, debug=False, max_retries: int = 3, save_metrics
         (生成的代码, 性能指标字典)
     """
     # 处理调试配置
-    if isinstance(debug, bool):
-        debug_config = {"steps": debug, "agents": False, "performance": debug}
-    else:
-        debug_config = debug
+    debug_config = _resolve_debug_config(debug)
     
     # 运行主函数
     code = run(query, debug=debug, max_retries=max_retries)